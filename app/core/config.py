@@ -1,4 +1,5 @@
 # app/core/config.py
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -11,6 +12,114 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str | None = None
     POSTGRES_PORT: str | None = None
 
+    # Connection pool of the application's single engine. Each API process
+    # can hold up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections; keep that
+    # times the number of processes below the server's max_connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # DigitalOcean droplet metrics on the health page. Cached figures older
+    # than DO_METRICS_STALE_SECONDS are refreshed in the background.
+    DIGITALOCEAN_TOKEN: str | None = None
+    DIGITALOCEAN_DROPLET_IDS: str = ""
+    DO_METRICS_STALE_SECONDS: float = 30.0
+    DO_HTTP_TIMEOUT_SECONDS: float = 10.0
+    DO_HTTP_MAX_CONNECTIONS: int = 10
+
+    # Docker log followers: lines kept per service for tails, lines queued
+    # per live viewer, and how long a tail waits for a just-started reader
+    LOG_BUFFER_LINES: int = 1000
+    LOG_SUBSCRIBER_QUEUE_SIZE: int = 1000
+    LOG_TAIL_WAIT_SECONDS: float = 1.0
+
+    # Prometheus metrics, served by a middleware. The path is unauthenticated;
+    # keep it off the public proxy.
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str = "/metrics"
+
+    # Per-request SQL profiling (development/staging): Server-Timing header,
+    # plus a warning for requests over these thresholds or with a statement
+    # repeated SQL_PROFILING_REPEAT_THRESHOLD times (likely N+1)
+    SQL_PROFILING_ENABLED: bool = False
+    SQL_PROFILING_REPEAT_THRESHOLD: int = 5
+    SQL_PROFILING_LOG_MIN_STATEMENTS: int = 20
+    SQL_PROFILING_LOG_MIN_DB_MS: float = 200.0
+
+    # Per-item stock snapshots for point-in-time queries, taken at interval
+    # boundaries once transactions up to the boundary have had time to commit
+    STOCK_SNAPSHOT_ENABLED: bool = True
+    STOCK_SNAPSHOT_INTERVAL_SECONDS: float = 86400.0
+    STOCK_SNAPSHOT_SETTLE_SECONDS: float = 300.0
+    # Older snapshots are deleted (0 keeps them all); queries before the
+    # oldest one roll it back through the ledger instead
+    STOCK_SNAPSHOT_RETENTION_DAYS: float = 400.0
+
+    # The catalog version behind list ETags is split into this many rows,
+    # keyed by item id, so writes to different items rarely share a row lock
+    CATALOG_VERSION_SHARDS: int = 64
+
+    # Bulk item import: rows validated and upserted per chunk, one commit each
+    ITEM_IMPORT_CHUNK_SIZE: int = 2000
+    ITEM_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    # Idempotency-Key on stock movement POSTs: stored responses are kept at
+    # least this long, and expired ones deleted every cleanup interval
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = 86400.0
+    IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS: float = 3600.0
+
+    # Group commit for POST /transactions/: movements on the same item that
+    # arrive within the window (or until the batch is full) are applied with
+    # one row lock, one UPDATE and one commit. Per process; off by default.
+    STOCK_COALESCING_ENABLED: bool = False
+    STOCK_COALESCE_WINDOW_SECONDS: float = 0.005
+    STOCK_COALESCE_MAX_BATCH: int = 64
+
+    # Low stock emails (serverless function)
+    SERVERLESS_EMAIL_URL: str | None = None
+    EMAIL_API_KEY: str | None = None
+    EMAIL_HTTP_TIMEOUT_SECONDS: float = 10.0
+
+    # Notification outbox worker
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 5.0
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 2.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 600.0
+    # A claimed batch is hidden from other workers this long; a worker that
+    # dies mid-batch leaves its rows to be retried once the lease runs out
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    # Delivered rows are deleted after this long (failed ones are kept)
+    OUTBOX_SENT_RETENTION_SECONDS: float = 7 * 86400.0
+    OUTBOX_CLEANUP_INTERVAL_SECONDS: float = 3600.0
+
+    # WebSocket fan-out: per-connection send queue and what to do when it is full
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SLOW_CONSUMER_POLICY: Literal["drop_oldest", "drop_newest", "disconnect"] = "drop_oldest"
+
+    # Cross-process event bus behind the WebSocket manager. "memory" only
+    # reaches sockets in this process; use "postgres" or "redis" when running
+    # several workers or replicas.
+    EVENT_BUS_BACKEND: Literal["memory", "postgres", "redis"] = "memory"
+    EVENT_BUS_CHANNEL: str = "ims_events"
+    REDIS_URL: str | None = None
+
+    # Authenticated principals are cached per process so most requests skip
+    # the users lookup. Tokens younger than AUTH_ROLE_CLAIM_MAX_AGE_SECONDS
+    # are authorized from their role claim alone.
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10_000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_ROLE_CLAIM_MAX_AGE_SECONDS: float = 300.0
+
+    # Password hashing runs on its own thread pool, apart from the request
+    # threadpool. Changing BCRYPT_ROUNDS rehashes each password at next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    # Hash requests allowed in flight (running + queued) before answering 503
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
     class Config:
         env_file = ".env"
         extra = "allow"
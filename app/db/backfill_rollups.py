@@ -0,0 +1,29 @@
+# app/db/backfill_rollups.py
+"""
+Rebuild the daily movement rollups from the transactions table.
+
+    python -m app.db.backfill_rollups                    # all history
+    python -m app.db.backfill_rollups --since 2024-01-01
+
+Run once after deploying the rollups, or to repair them. On Postgres, stock
+changes wait while it runs.
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from app.db.database import SessionLocal, engine
+from app.services.movement_rollups import rebuild
+
+
+async def main(since: date | None) -> None:
+    async with SessionLocal() as db:
+        written = await rebuild(db, since)
+    await engine.dispose()
+    print(f"✓ Rebuilt {written} movement rollup rows" + (f" from {since}" if since else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", type=date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+    asyncio.run(main(parser.parse_args().since))
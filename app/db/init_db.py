@@ -1,40 +1,64 @@
 # app/db/init_db.py
 import os
-from sqlalchemy.orm import sessionmaker
-from app.database import Base, engine
+from sqlalchemy import inspect, select, text
+from app.db.database import Base, SessionLocal, engine
 from app.models.user import User, UserRole
 from app.models.item import Item
 from app.models.transaction import Transaction
-from app.core.security import hash_password
+from app.services.password_hasher import password_hasher
+
+def create_schema(conn):
+    Base.metadata.create_all(bind=conn)
+    add_missing_columns(conn)
+    # create_all() skips tables that already exist, so indexes added to the
+    # models after the first deployment have to be created explicitly.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+def add_missing_columns(conn):
+    """
+    create_all() never alters existing tables, so add columns introduced
+    since the first deployment. They must be nullable or have a server default.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            conn.execute(text(ddl))
+
+async def init_db():
+    # Runs on the application's engine, so startup shares its pool
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
-    
     # Create first manager if needed (for production deployments)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = SessionLocal()
-    
-    try:
-        # Check if any manager exists
-        manager_exists = db.query(User).filter(User.role == UserRole.manager).first()
-        if not manager_exists:
-            # Try to create from environment variables (for Fly.io deployment)
-            admin_username = os.getenv("ADMIN_USERNAME")
-            admin_password = os.getenv("ADMIN_PASSWORD")
-            
-            if admin_username and admin_password:
-                user = User(
-                    username=admin_username,
-                    email=f"{admin_username}@ims.local",
-                    hashed_password=hash_password(admin_password),
-                    role=UserRole.manager,
-                    is_active=True
-                )
-                db.add(user)
-                db.commit()
-                print(f"✓ Initial manager user created: {admin_username}")
-    except Exception as e:
-        print(f"Note: Could not create initial manager: {e}")
+    async with SessionLocal() as db:
+        try:
+            # Check if any manager exists
+            manager_exists = await db.scalar(select(User).where(User.role == UserRole.manager).limit(1))
+            if not manager_exists:
+                # Try to create from environment variables (for Fly.io deployment)
+                admin_username = os.getenv("ADMIN_USERNAME")
+                admin_password = os.getenv("ADMIN_PASSWORD")
 
-    finally:
-        db.close()
\ No newline at end of file
+                if admin_username and admin_password:
+                    user = User(
+                        username=admin_username,
+                        email=f"{admin_username}@ims.local",
+                        hashed_password=await password_hasher.hash(admin_password),
+                        role=UserRole.manager,
+                        is_active=True
+                    )
+                    db.add(user)
+                    await db.commit()
+                    print(f"✓ Initial manager user created: {admin_username}")
+        except Exception as e:
+            print(f"Note: Could not create initial manager: {e}")
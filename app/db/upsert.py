@@ -0,0 +1,11 @@
+# app/db/upsert.py
+"""INSERT ... ON CONFLICT for the dialects the application runs on."""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert(db: AsyncSession, table):
+    """An INSERT with `on_conflict_do_update` for the session's dialect."""
+    return UPSERT_DIALECTS[db.bind.dialect.name](table)
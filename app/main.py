@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from app.core.config import settings
+from app.db.database import engine
 from app.db.init_db import init_db
-from app.routers import auth, users, inventory, transactions, ws, health
+from app.routers import auth, users, inventory, transactions, ws, health, analytics
+from app.services.outbox_worker import outbox_worker
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
+from app.services.service_logs import service_logs
+from app.services.stock_snapshots import stock_snapshot_job
+from app.services import sql_profiler
+from app.services.droplet_metrics import droplet_metrics
+from app.services.metrics import MetricsMiddleware
+from app.services.event_bus import event_bus
+from app.services.idempotency import idempotency_cleanup
+from app.services.write_coalescer import write_coalescer
 
 app = FastAPI(title="IMS Inventory API")
 
@@ -14,12 +27,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Server-Timing", "ETag", "Idempotent-Replayed"],
 )
 
+if settings.SQL_PROFILING_ENABLED:
+    sql_profiler.install(engine)
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware)
+
+# Outermost, so request latency includes every other middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, path=settings.METRICS_PATH)
+
+
+@app.on_event("startup")
+async def on_startup():
+    await init_db()
+
 
 @app.on_event("startup")
-def on_startup():
-    init_db()
+async def start_background_workers():
+    await outbox_worker.start()
+    await event_bus.start()
+    await droplet_metrics.start()
+    if settings.STOCK_SNAPSHOT_ENABLED:
+        await stock_snapshot_job.start()
+    await idempotency_cleanup.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    # Apply movements still waiting for their batch before anything else stops
+    await write_coalescer.stop()
+    await idempotency_cleanup.stop()
+    await stock_snapshot_job.stop()
+    await service_logs.stop()
+    await droplet_metrics.stop()
+    await event_bus.stop()
+    await outbox_worker.stop()
+    password_hasher.shutdown()
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-ins in progress, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -34,3 +88,4 @@ app.include_router(inventory.router)
 app.include_router(transactions.router)
 app.include_router(ws.router)
 app.include_router(health.router)
+app.include_router(analytics.router)
@@ -1,3 +1,8 @@
 from app.models.user import User  # noqa
 from app.models.item import Item  # noqa
-from app.models.transaction import Transaction  # noqa
\ No newline at end of file
+from app.models.transaction import Transaction  # noqa
+from app.models.notification import NotificationOutbox  # noqa
+from app.models.stock_snapshot import StockSnapshot  # noqa
+from app.models.movement_rollup import MovementRollup  # noqa
+from app.models.catalog_state import CatalogState  # noqa
+from app.models.idempotency_key import IdempotencyKey  # noqa
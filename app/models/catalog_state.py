@@ -0,0 +1,14 @@
+# app/models/catalog_state.py
+from sqlalchemy import Column, Integer, BigInteger
+from app.db.database import Base
+
+class CatalogState(Base):
+    """
+    One shard of the catalog version. Every write to an item bumps the
+    shard of its id (see app.services.catalog_version), and list responses
+    are revalidated against the sum of all shards without reading any items.
+    """
+    __tablename__ = "catalog_state"
+
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
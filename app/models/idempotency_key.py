@@ -0,0 +1,29 @@
+# app/models/idempotency_key.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from app.db.database import Base
+from datetime import datetime
+
+class IdempotencyKey(Base):
+    """
+    The response to a POST sent with an `Idempotency-Key` header.
+
+    Written in the same database transaction as the change it describes, so
+    a key is recorded if and only if the change is committed; a retry with
+    the same key gets this response back instead of repeating the change.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # Keys are per user, so clients cannot collide with (or replay) each other
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),
+        # TTL cleanup deletes by age
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    # Hash of the endpoint and request body, to reject a key reused for another request
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,10 +1,27 @@
 # app/models/item.py
-from sqlalchemy import Column, Integer, String, Float, Boolean
+from sqlalchemy import Column, DateTime, Integer, String, Float, Boolean, Index, func, text
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.db.database import Base
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        # Keyset pagination of the catalog: one (sort column, id) index per
+        # sortable column. SKU is unique, so its own index already suffices.
+        Index("ix_items_name_id", "name", "id"),
+        Index("ix_items_quantity_id", "quantity", "id"),
+        Index("ix_items_price_id", "price", "id"),
+        # Reorder view: only items at or below their threshold are indexed, so
+        # the database keeps membership right whichever column changes. The
+        # query must repeat this exact predicate for the planner to use it.
+        Index(
+            "ix_items_low_stock",
+            "quantity",
+            "id",
+            postgresql_where=text("quantity <= low_stock_threshold"),
+            sqlite_where=text("quantity <= low_stock_threshold"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
@@ -13,5 +30,17 @@ class Item(Base):
     quantity = Column(Integer, default=0, nullable=False)
     low_stock_threshold = Column(Integer, default=5, nullable=False)
     price = Column(Float, default=0.0)
+    # Bumped by every UPDATE, ORM or Core, unless the statement sets it itself;
+    # serves as the item's ETag (see app.services.catalog_version).
+    version = Column(Integer, default=1, server_default="1", nullable=False, onupdate=text("version + 1"))
+    # Postgres also sets this from a trigger (infra/db/init/001_schema.sql)
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
+    # NULL for items that predate the column; stock snapshots treat those as
+    # having always existed
+    created_at = Column(DateTime(timezone=True), default=func.now(), nullable=True)
 
-    transactions = relationship("Transaction", back_populates="item")
\ No newline at end of file
+    transactions = relationship("Transaction", back_populates="item")
+
+    # Read version and updated_at back in the flush that changes them, so
+    # they never need a lazy load after commit.
+    __mapper_args__ = {"eager_defaults": True}
\ No newline at end of file
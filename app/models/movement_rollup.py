@@ -0,0 +1,24 @@
+# app/models/movement_rollup.py
+from sqlalchemy import Column, Integer, ForeignKey, Date, Index
+from app.db.database import Base
+
+class MovementRollup(Base):
+    """
+    IN and OUT totals of one item on one (UTC) day.
+
+    Kept up to date in the same database transaction as every stock change
+    (see app.services.movement_rollups), so analytics never have to scan
+    the transactions table.
+    """
+    __tablename__ = "movement_rollups"
+    __table_args__ = (
+        # Dashboard queries filter by day range across all items
+        Index("ix_movement_rollups_day_item_id", "day", "item_id"),
+    )
+
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    quantity_in = Column(Integer, nullable=False, default=0)
+    quantity_out = Column(Integer, nullable=False, default=0)
+    transactions_in = Column(Integer, nullable=False, default=0)
+    transactions_out = Column(Integer, nullable=False, default=0)
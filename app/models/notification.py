@@ -0,0 +1,34 @@
+# app/models/notification.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from app.db.database import Base
+from datetime import datetime
+import enum
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+class NotificationOutbox(Base):
+    """
+    Notifications waiting to be delivered by the outbox worker.
+
+    Rows are written in the same database transaction as the change that
+    triggers them, so a notification is recorded if and only if the change
+    is committed.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # The worker only ever scans for due, pending rows.
+        Index("ix_notification_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, default=OutboxStatus.pending.value, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
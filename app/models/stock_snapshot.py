@@ -0,0 +1,22 @@
+# app/models/stock_snapshot.py
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index, UniqueConstraint
+from app.db.database import Base
+
+class StockSnapshot(Base):
+    """
+    An item's quantity as of `taken_at`, i.e. including every transaction
+    created at or before that time. Written by the stock snapshot job at
+    interval boundaries, so every replica computes the same `taken_at`.
+    """
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        # Also the lookup index: nearest snapshot of an item before/after a time
+        UniqueConstraint("item_id", "taken_at", name="uq_stock_snapshots_item_id_taken_at"),
+        # Whether a boundary has been taken yet
+        Index("ix_stock_snapshots_taken_at", "taken_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, nullable=False)
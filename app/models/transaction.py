@@ -1,7 +1,7 @@
 # app/models/transaction.py
-from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.db.database import Base
 from datetime import datetime
 import enum
 class TransactionType(str, enum.Enum):
@@ -10,6 +10,13 @@ class TransactionType(str, enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest first; the filtered
+        # variants let per-item / per-user history pages use the same order.
+        Index("ix_transactions_created_at_id", "created_at", "id"),
+        Index("ix_transactions_item_id_created_at_id", "item_id", "created_at", "id"),
+        Index("ix_transactions_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -19,4 +26,4 @@ class Transaction(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="transactions")
-    item = relationship("Item", back_populates="transactions")
\ No newline at end of file
+    item = relationship("Item", back_populates="transactions")
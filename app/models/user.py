@@ -1,7 +1,7 @@
 # app/models/user.py
 from sqlalchemy import Column, Integer, String, Boolean, Enum
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.db.database import Base
 import enum
 
 class UserRole(str, enum.Enum):
@@ -18,5 +18,7 @@ class User(Base):
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     role = Column(Enum(UserRole), default=UserRole.staff, nullable=False)
+    # Carried in access tokens as "ver"; bumped to revoke them (see app.services.principals)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     transactions = relationship("Transaction", back_populates="user")
\ No newline at end of file
@@ -1 +1 @@
-from app.routers import auth, users, inventory, transactions, health  # noqa
\ No newline at end of file
+from app.routers import auth, users, inventory, transactions, health, analytics  # noqa
\ No newline at end of file
@@ -0,0 +1,58 @@
+# app/routers/analytics.py
+"""
+Movement analytics for the manager dashboard. Everything here reads the
+daily movement rollups, never the transactions table.
+"""
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_db
+from app.routers.dependencies import get_current_manager
+from app.schemas.analytics import MovementPeriod, TopMover
+from app.services import movement_rollups
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+def _date_range(since: date | None, until: date | None) -> tuple[date, date]:
+    until = until or datetime.utcnow().date()
+    since = since or until - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if since > until:
+        raise HTTPException(status_code=400, detail="since must not be after until")
+    if (until - since).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+    return since, until
+
+
+@router.get("/movements", response_model=list[MovementPeriod])
+async def get_movements(
+    since: date | None = Query(None, description="First day (UTC); defaults to 30 days before until"),
+    until: date | None = Query(None, description="Last day (UTC), inclusive; defaults to today"),
+    granularity: Literal["day", "week"] = "day",
+    item_id: int | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_manager),
+):
+    """IN and OUT totals per item and day or week (weeks start on Monday)."""
+    since, until = _date_range(since, until)
+    return await movement_rollups.movements(db, since, until, granularity, item_id)
+
+
+@router.get("/top-movers", response_model=list[TopMover])
+async def get_top_movers(
+    since: date | None = Query(None, description="First day (UTC); defaults to 30 days before until"),
+    until: date | None = Query(None, description="Last day (UTC), inclusive; defaults to today"),
+    direction: Literal["in", "out", "total"] = "out",
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_manager),
+):
+    """The items that moved the most units in the range."""
+    since, until = _date_range(since, until)
+    return await movement_rollups.top_movers(db, since, until, direction, limit)
@@ -1,10 +1,12 @@
 # app/routers/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.core.security import verify_password, create_access_token, hash_password
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db
+from app.core.security import create_access_token
 from app.models.user import User
+from app.services.password_hasher import password_hasher
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -13,46 +15,56 @@ class RegisterRequest(BaseModel):
     username: str
     password: str
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/register")
-def register(
+async def register(
     user_in: RegisterRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Public registration endpoint for self-signup (creates staff users)."""
-    existing = db.query(User).filter(User.username == user_in.username).first()
+    existing = await db.scalar(select(User).where(User.username == user_in.username))
     if existing:
         raise HTTPException(status_code=400, detail="Username already taken")
     
     user = User(
         username=user_in.username,
         email=user_in.username,  # Use username as email if not provided
-        hashed_password=hash_password(user_in.password),
+        # bcrypt is CPU bound; it runs on the dedicated hashing pool
+        hashed_password=await password_hasher.hash(user_in.password),
         role="staff",  # New registrations are staff by default
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return {"id": user.id, "username": user.username, "role": user.role}
 
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # Check by username first, then by email
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user:
-        user = db.query(User).filter(User.email == form_data.username).first()
+    candidates = (
+        await db.scalars(
+            select(User).where(
+                or_(User.username == form_data.username, User.email == form_data.username)
+            )
+        )
+    ).all()
+    user = next((u for u in candidates if u.username == form_data.username), None)
+    if not user and candidates:
+        user = candidates[0]
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username/email or password")
+    verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect username/email or password")
+    if new_hash:
+        # Hashed with an outdated cost factor. A Core UPDATE on purpose: the
+        # password itself is unchanged, so this must not revoke the user's
+        # tokens the way an ORM change to hashed_password does.
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await db.commit()
 
-    token = create_access_token({"sub": str(user.id), "role": user.role.value})
-    return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
+    token = create_access_token({"sub": str(user.id), "role": user.role.value, "ver": user.token_version})
+    return {"access_token": token, "token_type": "bearer"}
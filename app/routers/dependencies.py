@@ -2,49 +2,63 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db
 from app.core.config import settings
 from app.models.user import User, UserRole
+from app.services.principals import Principal, principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 ALGORITHM = "HS256"
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class InvalidCredentials(Exception):
+    pass
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    cred_exc = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def resolve_principal(token: str, db: AsyncSession) -> Principal:
+    """
+    Resolve the caller from the cache or a fresh role claim; only fall back
+    to the users table when neither applies. The session is lazy, so a
+    request that never reaches the lookup never checks out a connection.
+    """
+    cred_exc = InvalidCredentials()
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
-        user_id: int | None = payload.get("sub")
-        if user_id is None:
-            raise cred_exc
-    except JWTError:
+        user_id = int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
         raise cred_exc
+    # Tokens issued before versioning carry no "ver"
+    token_version = payload.get("ver", 0)
 
-    user = db.query(User).get(int(user_id))
-    if user is None:
+    principal = principal_cache.get(user_id, token_version) or principal_cache.from_claims(payload)
+    if principal is not None:
+        return principal
+
+    user = await db.get(User, user_id)
+    if user is None or user.is_active is False or user.token_version != token_version:
         raise cred_exc
-    return user
+    return principal_cache.put(Principal.from_user(user))
 
-def get_current_manager(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    try:
+        return await resolve_principal(token, db)
+    except InvalidCredentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+# The role checks do no I/O, so they are async to keep FastAPI from
+# dispatching them to the threadpool.
+async def get_current_manager(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role != UserRole.manager:
         raise HTTPException(status_code=403, detail="Managers only")
     return current_user
 
-def get_current_staff_or_manager(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_staff_or_manager(current_user: Principal = Depends(get_current_user)) -> Principal:
     if current_user.role not in {UserRole.manager, UserRole.staff}:
         raise HTTPException(status_code=403, detail="Unauthorized role")
-    return current_user
\ No newline at end of file
+    return current_user
@@ -1,93 +1,285 @@
 # app/routers/inventory.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.schemas.item import ItemCreate, ItemUpdate, ItemRead
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_db
+from app.schemas.item import ItemCreate, ItemImportReport, ItemUpdate, ItemRead, StockAtRead
 from app.models.item import Item
-from app.routers.dependencies import get_current_staff_or_manager
+from app.routers.dependencies import get_current_manager, get_current_staff_or_manager
+from app.services.catalog_version import (
+    bump_catalog_version,
+    catalog_etag,
+    catalog_version,
+    etag_matches,
+    item_etag,
+    not_modified,
+    set_etag,
+)
+from app.services.fast_json import model_columns, rows_response
+from app.services.item_import import ImportFormatError, import_item_file
+from app.services.stock_snapshots import stock_at
 from app.services.websocket_manager import manager
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor_or_400,
+    encode_cursor,
+)
 
 router = APIRouter(prefix="/items", tags=["items"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+SORT_COLUMNS = {
+    "name": Item.name,
+    "sku": Item.sku,
+    "quantity": Item.quantity,
+    "price": Item.price,
+}
+
+# List endpoints return rows of just these, encoded by orjson
+ITEM_READ_COLUMNS = model_columns(Item, ItemRead)
 
 @router.post("/", response_model=ItemRead)
 async def create_item(
     item_in: ItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_staff_or_manager),
 ):
-    existing = db.query(Item).filter(Item.sku == item_in.sku).first()
+    existing = await db.scalar(select(Item.id).where(Item.sku == item_in.sku))
     if existing:
         raise HTTPException(status_code=400, detail="SKU already exists")
     item = Item(**item_in.model_dump())
     db.add(item)
-    db.commit()
-    db.refresh(item)
+    await db.flush()  # assigns the id
+    await bump_catalog_version(db, [item.id])
+    await db.commit()
+    await db.refresh(item)
     # Broadcast item creation
     await manager.broadcast({
         "type": "item_created",
         "data": {"id": item.id, "name": item.name, "sku": item.sku}
-    })
+    }, item_ids=[item.id], skus=[item.sku])
     return item
 
+@router.post("/import", response_model=ItemImportReport)
+async def import_items(
+    file: UploadFile,
+    format: Literal["csv", "ndjson"] | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_manager),
+):
+    """
+    Create or update items in bulk from a CSV or JSON Lines upload, by SKU.
+
+    `format` defaults to ndjson for `.jsonl`/`.ndjson` files and to csv
+    otherwise; a CSV needs a header row with at least `sku` and `name`.
+    Invalid rows are skipped and listed in `errors`; one `items_imported`
+    event is broadcast for the whole import.
+    """
+    if format is None:
+        is_ndjson = (file.filename or "").lower().endswith((".jsonl", ".ndjson"))
+        format = "ndjson" if is_ndjson else "csv"
+    try:
+        report = await import_item_file(db, file.file, format)
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if report.created or report.updated:
+        await manager.broadcast({
+            "type": "items_imported",
+            "data": {"created": report.created, "updated": report.updated, "failed": report.failed},
+        })
+    return asdict(report)
+
 @router.get("/", response_model=list[ItemRead])
 async def list_items(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    sort: Literal["name", "sku", "quantity", "price"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    min_quantity: int | None = None,
+    max_quantity: int | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    below_threshold: bool = False,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_staff_or_manager),
 ):
-    return db.query(Item).all()
+    """
+    List items one page at a time, sorted by `sort` with id as tie-breaker.
+
+    The cursor for the next page is returned in the `X-Next-Cursor` header and
+    the number of matching items in `X-Total-Count`. Counting scans every
+    matching row, so pass `include_total=false` to skip it on large catalogs.
+
+    The ETag changes with every write to the catalog; a matching
+    `If-None-Match` gets a 304 without any item being read.
+    """
+    etag = catalog_etag(request, await catalog_version(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    filters = []
+    if min_quantity is not None:
+        filters.append(Item.quantity >= min_quantity)
+    if max_quantity is not None:
+        filters.append(Item.quantity <= max_quantity)
+    if min_price is not None:
+        filters.append(Item.price >= min_price)
+    if max_price is not None:
+        filters.append(Item.price <= max_price)
+    if below_threshold:
+        filters.append(Item.quantity <= Item.low_stock_threshold)
+
+    if include_total:
+        total = await db.scalar(select(func.count(Item.id)).where(*filters))
+        response.headers["X-Total-Count"] = str(total)
+
+    query = select(*ITEM_READ_COLUMNS).where(*filters)
+
+    column = SORT_COLUMNS[sort]
+    if cursor:
+        cursor_sort, cursor_order, last_value, last_id = decode_cursor_or_400(cursor, 4)
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+        key, last_key = tuple_(column, Item.id), tuple_(last_value, last_id)
+        query = query.where(key > last_key if order == "asc" else key < last_key)
+
+    if order == "asc":
+        query = query.order_by(column.asc(), Item.id.asc())
+    else:
+        query = query.order_by(column.desc(), Item.id.desc())
+
+    items = (await db.execute(query.limit(limit + 1))).all()
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            sort, order, getattr(last, sort), last.id
+        )
+    return rows_response(items, response)
+
+@router.get("/low-stock", response_model=list[ItemRead])
+async def list_low_stock_items(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_staff_or_manager),
+):
+    """
+    Items at or below their low-stock threshold, emptiest first.
+
+    Served from the partial index `ix_items_low_stock`, so both the page and
+    `X-Total-Count` only touch low-stock rows however large the catalog is.
+    Revalidates like the full listing.
+    """
+    etag = catalog_etag(request, await catalog_version(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    low_stock = Item.quantity <= Item.low_stock_threshold
+
+    if include_total:
+        total = await db.scalar(select(func.count(Item.id)).where(low_stock))
+        response.headers["X-Total-Count"] = str(total)
+
+    query = select(*ITEM_READ_COLUMNS).where(low_stock)
+    if cursor:
+        last_quantity, last_id = decode_cursor_or_400(cursor, 2)
+        query = query.where(tuple_(Item.quantity, Item.id) > tuple_(last_quantity, last_id))
+
+    items = (await db.execute(
+        query.order_by(Item.quantity.asc(), Item.id.asc()).limit(limit + 1)
+    )).all()
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(items[-1].quantity, items[-1].id)
+    return rows_response(items, response)
 
 @router.get("/{item_id}", response_model=ItemRead)
 async def get_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_staff_or_manager),
 ):
-    item = db.query(Item).get(item_id)
+    if "if-none-match" in request.headers:
+        # Revalidation only needs the version, not the row
+        version = await db.scalar(select(Item.version).where(Item.id == item_id))
+        if version is not None and etag_matches(request, item_etag(item_id, version)):
+            return not_modified(item_etag(item_id, version))
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
+    set_etag(response, item_etag(item.id, item.version))
     return item
 
+@router.get("/{item_id}/stock-at", response_model=StockAtRead)
+async def get_item_stock_at(
+    item_id: int,
+    ts: datetime = Query(..., description="Point in time; naive values are UTC"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_staff_or_manager),
+):
+    """
+    Stock of an item as of `ts`, from the latest periodic snapshot before it
+    plus the transactions since. Before the first snapshot the answer is
+    rolled back from a later quantity and marked `approximate`.
+    """
+    item = await db.get(Item, item_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return await stock_at(db, item, ts)
+
 @router.put("/{item_id}", response_model=ItemRead)
 async def update_item(
     item_id: int,
     item_in: ItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_staff_or_manager),
 ):
-    item = db.query(Item).get(item_id)
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     for field, value in item_in.model_dump(exclude_unset=True).items():
         setattr(item, field, value)
-    db.commit()
-    db.refresh(item)
+    await bump_catalog_version(db, [item.id])
+    await db.commit()
+    await db.refresh(item)
     # Broadcast item update
     await manager.broadcast({
         "type": "item_updated",
         "data": {"id": item.id, "name": item.name, "quantity": item.quantity}
-    })
+    }, item_ids=[item.id], skus=[item.sku])
     return item
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(
     item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_staff_or_manager),
 ):
-    item = db.query(Item).get(item_id)
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await bump_catalog_version(db, [item_id])
+    await db.commit()
     # Broadcast item deletion
     await manager.broadcast({
         "type": "item_deleted",
         "data": {"id": item_id}
-    })
\ No newline at end of file
+    }, item_ids=[item_id], skus=[item.sku])
\ No newline at end of file
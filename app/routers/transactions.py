@@ -1,38 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Literal
 
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
 from app.db.database import get_db
-from app.models.item import Item
-from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionOut
+from app.models.transaction import Transaction, TransactionType
+from app.schemas.transaction import (
+    TransactionBatchCreate,
+    TransactionBatchOut,
+    TransactionCreate,
+    TransactionOut,
+)
 from app.routers.dependencies import get_current_user
-from app.services.transaction_service import apply_stock_change, InsufficientStockError
+from app.services.transaction_service import (
+    apply_stock_change,
+    apply_stock_changes,
+    BatchRejectedError,
+    InsufficientStockError,
+    ItemNotFoundError,
+)
+from app.services.fast_json import model_columns, rows_response
+from app.services.idempotency import (
+    find_response,
+    remember_response,
+    replay,
+    request_fingerprint,
+)
+from app.services.outbox_worker import outbox_worker
 from app.services.websocket_manager import manager
-import requests, os
+from app.services.write_coalescer import write_coalescer
+from app.services.ledger_export import (
+    EXPORT_MEDIA_TYPES,
+    ledger_export_statement,
+    stream_csv,
+    stream_ndjson,
+)
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor_or_400,
+    encode_cursor,
+)
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
+# The history list returns rows of just these, encoded by orjson
+TRANSACTION_OUT_COLUMNS = model_columns(Transaction, TransactionOut)
+
+
+async def _replay_concurrent(db: AsyncSession, user_id: int, key: str, fingerprint: str, exc: IntegrityError):
+    """
+    A request with the same key committed while this one ran, so this one's
+    change was rolled back with its copy of the key; answer like the winner.
+    """
+    await db.rollback()
+    stored = await find_response(db, user_id, key)
+    if stored is None:
+        raise exc
+    return replay(stored, fingerprint)
+
 
 @router.post("/", response_model=TransactionOut)
 async def create_transaction(
     tx_in: TransactionCreate,
-    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    item = db.query(Item).get(tx_in.item_id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
+    """
+    Record a stock movement.
+
+    A request sent again with the same `Idempotency-Key` header gets the
+    original response back (with `Idempotent-Replayed: true`) and moves no
+    stock; reusing a key for a different request is rejected with a 422.
+
+    With STOCK_COALESCING_ENABLED, movements on the same item arriving
+    together are committed as one batch (see app.services.write_coalescer);
+    keyed requests are applied on their own.
+    """
+    remember = None
+    if idempotency_key:
+        fingerprint = request_fingerprint("POST /transactions/", tx_in)
+        stored = await find_response(db, current_user.id, idempotency_key)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        def remember(tx):
+            remember_response(
+                db, current_user.id, idempotency_key, fingerprint, TransactionOut.model_validate(tx)
+            )
 
     try:
-        tx, is_low_stock = apply_stock_change(
-            db=db,
-            item=item,
-            type=tx_in.type,
-            quantity=tx_in.quantity,
-            user_id=current_user.id,
-        )
+        if settings.STOCK_COALESCING_ENABLED and not idempotency_key:
+            tx, item, quantity, is_low_stock = await write_coalescer.submit(
+                item_id=tx_in.item_id,
+                type=tx_in.type,
+                quantity=tx_in.quantity,
+                user_id=current_user.id,
+            )
+        else:
+            tx, item, quantity, is_low_stock = await apply_stock_change(
+                db=db,
+                item_id=tx_in.item_id,
+                type=tx_in.type,
+                quantity=tx_in.quantity,
+                user_id=current_user.id,
+                before_commit=remember,
+            )
+    except ItemNotFoundError:
+        raise HTTPException(status_code=404, detail="Item not found")
     except InsufficientStockError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    except IntegrityError as exc:
+        if not idempotency_key:
+            raise
+        return await _replay_concurrent(db, current_user.id, idempotency_key, fingerprint, exc)
     
     # Broadcast transaction creation
     await manager.broadcast({
@@ -43,17 +130,18 @@ async def create_transaction(
             "type": tx.type.value,
             "quantity": tx.quantity,
         }
-    })
+    }, item_ids=[item.id], skus=[item.sku])
     
-    # Also broadcast item update since stock changed
+    # Also broadcast item update since stock changed; the quantity is the
+    # one this movement left, even when it was committed in a batch
     await manager.broadcast({
         "type": "item_updated",
         "data": {
             "id": item.id,
             "name": item.name,
-            "quantity": item.quantity
+            "quantity": quantity
         }
-    })
+    }, item_ids=[item.id], skus=[item.sku])
 
     # Broadcast low stock alert if needed
     if is_low_stock:
@@ -62,27 +150,189 @@ async def create_transaction(
             "data": {
                 "item_id": item.id,
                 "name": item.name,
-                "quantity": item.quantity,
+                "quantity": quantity,
                 "sku": item.sku,
                 "threshold": item.low_stock_threshold,
-                "message": f"⚠️ Low stock alert: {item.name} has only {item.quantity} left!"
+                "message": f"⚠️ Low stock alert: {item.name} has only {quantity} left!"
             }
-        })
-        # use serverless integration to send email notifications
-        response = requests.post(os.environ.get('SERVERLESS_EMAIL_URL'), 
-                      headers={"Authorization": f"Bearer {os.environ.get('EMAIL_API_KEY')}", "Content-Type": "application/json"},
-                      json={"subject": f"Low Stock Alert - {item.name}",
-                            "text": f"⚠️ Low stock alert: {item.name} - {item.sku} has only {item.quantity} left!"}
-        )
-        print(f"INFO: Email API Response Status: {response.status_code}")
-        print(f"INFO: Email API Response Body: {response.text}")
+        }, item_ids=[item.id], skus=[item.sku])
+        # the email was queued with the stock change; deliver it now
+        outbox_worker.wake()
     
     return tx
 
 
+@router.post("/batch", response_model=TransactionBatchOut)
+async def create_transaction_batch(
+    batch_in: TransactionBatchCreate,
+    idempotency_key: str | None = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Apply many stock movements in one database transaction.
+
+    In `all_or_nothing` mode a single failing movement rejects the batch with
+    a 400 listing every failure; in `best_effort` mode the failing movements
+    are skipped and reported in `errors`. One aggregated
+    `transactions_batch_created` event is broadcast for the whole batch.
+    Accepts an `Idempotency-Key` header like `POST /transactions/`.
+    """
+    remember = None
+    if idempotency_key:
+        fingerprint = request_fingerprint("POST /transactions/batch", batch_in)
+        stored = await find_response(db, current_user.id, idempotency_key)
+        if stored is not None:
+            return replay(stored, fingerprint)
+
+        def remember(transactions, errors):
+            remember_response(
+                db, current_user.id, idempotency_key, fingerprint,
+                TransactionBatchOut.model_validate(
+                    {"transactions": transactions, "errors": errors}, from_attributes=True
+                ),
+            )
+
+    try:
+        transactions, errors, items = await apply_stock_changes(
+            db=db,
+            changes=batch_in.transactions,
+            user_id=current_user.id,
+            atomic=batch_in.mode == "all_or_nothing",
+            before_commit=remember,
+        )
+    except BatchRejectedError as exc:
+        raise HTTPException(status_code=400, detail=exc.errors)
+    except IntegrityError as exc:
+        if not idempotency_key:
+            raise
+        return await _replay_concurrent(db, current_user.id, idempotency_key, fingerprint, exc)
+
+    low_stock_items = [item for item in items if item.quantity <= item.low_stock_threshold]
+    if transactions:
+        await manager.broadcast({
+            "type": "transactions_batch_created",
+            "data": {
+                "transactions": [
+                    {
+                        "id": tx.id,
+                        "item_id": tx.item_id,
+                        "type": tx.type.value,
+                        "quantity": tx.quantity,
+                    }
+                    for tx in transactions
+                ],
+                "items": [
+                    {"id": item.id, "name": item.name, "quantity": item.quantity}
+                    for item in items
+                ],
+                "low_stock": [
+                    {
+                        "item_id": item.id,
+                        "name": item.name,
+                        "quantity": item.quantity,
+                        "sku": item.sku,
+                        "threshold": item.low_stock_threshold,
+                        "message": f"⚠️ Low stock alert: {item.name} has only {item.quantity} left!"
+                    }
+                    for item in low_stock_items
+                ],
+            }
+        }, item_ids=[item.id for item in items], skus=[item.sku for item in items])
+    if low_stock_items:
+        outbox_worker.wake()
+
+    return {"transactions": transactions, "errors": errors}
+
+
+def _transaction_filters(
+    item_id: int | None,
+    user_id: int | None,
+    type: TransactionType | None,
+    since: datetime | None,
+    until: datetime | None,
+) -> list:
+    """Translate the optional query parameters into SQL filter clauses."""
+    filters = []
+    if item_id is not None:
+        filters.append(Transaction.item_id == item_id)
+    if user_id is not None:
+        filters.append(Transaction.user_id == user_id)
+    if type is not None:
+        filters.append(Transaction.type == type)
+    if since is not None:
+        filters.append(Transaction.created_at >= since)
+    if until is not None:
+        filters.append(Transaction.created_at < until)
+    return filters
+
+
 @router.get("/", response_model=list[TransactionOut])
 async def list_transactions(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    item_id: int | None = None,
+    user_id: int | None = None,
+    type: TransactionType | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    List transactions newest first, one page at a time.
+
+    Pages are keyed on (created_at, id). When more rows are available the
+    cursor for the next page is returned in the `X-Next-Cursor` header; pass
+    it back as `cursor` to continue. `since` is inclusive, `until` exclusive.
+    """
+    query = select(*TRANSACTION_OUT_COLUMNS).where(
+        *_transaction_filters(item_id, user_id, type, since, until)
+    )
+    if cursor:
+        last_created_at, last_id = decode_cursor_or_400(cursor, 2)
+        query = query.where(
+            tuple_(Transaction.created_at, Transaction.id) < tuple_(last_created_at, last_id)
+        )
+
+    rows = (
+        await db.execute(
+            query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+            .limit(limit + 1)
+        )
+    ).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return rows_response(rows, response)
+
+
+@router.get("/export")
+async def export_transactions(
+    format: Literal["csv", "ndjson"] = "csv",
+    item_id: int | None = None,
+    user_id: int | None = None,
+    type: TransactionType | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    return db.query(Transaction).order_by(Transaction.created_at.desc()).all()
\ No newline at end of file
+    """
+    Stream the transaction ledger, oldest first, as CSV or NDJSON.
+
+    Accepts the same filters as `GET /transactions/`. Rows are read through a
+    server-side cursor and written out chunk by chunk, so the whole history
+    is never held in memory.
+    """
+    statement = ledger_export_statement(
+        _transaction_filters(item_id, user_id, type, since, until)
+    )
+    stream = stream_csv if format == "csv" else stream_ndjson
+    return StreamingResponse(
+        stream(db, statement),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
@@ -1,39 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut
-from app.core.security import hash_password
 from app.routers.dependencies import get_current_manager
+from app.services.password_hasher import password_hasher
+from app.services.principals import Principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.post("/", response_model=UserOut)
-def create_user(
+async def create_user(
     user_in: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_manager),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_manager),
 ):
-    existing = db.query(User).filter(User.username == user_in.username).first()
+    existing = await db.scalar(select(User).where(User.username == user_in.username))
     if existing:
         raise HTTPException(status_code=400, detail="Username already taken")
     user = User(
         username=user_in.username,
         email=f"{user_in.username}@ims.local",
-        hashed_password=hash_password(user_in.password),
+        # bcrypt is CPU bound; it runs on the dedicated hashing pool
+        hashed_password=await password_hasher.hash(user_in.password),
         role=user_in.role,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.get("/", response_model=list[UserOut])
-def list_users(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_manager),
+async def list_users(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_manager),
 ):
-    return db.query(User).all()
\ No newline at end of file
+    return (await db.scalars(select(User))).all()
@@ -2,24 +2,60 @@
 """
 WebSocket endpoint for real-time updates
 """
+import json
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from app.services.websocket_manager import manager
 
 router = APIRouter(tags=["WebSocket"])
 
+
+def _handle_client_message(websocket: WebSocket, data: str):
+    """
+    Apply a subscription message from a client, e.g.
+
+        {"action": "subscribe", "event_types": ["low_stock_alert"],
+         "item_ids": [12], "sku_prefixes": ["A1-"]}
+
+    `unsubscribe` takes the same fields. The client's resulting
+    subscriptions are sent back as a `subscriptions` message.
+    """
+    try:
+        request = json.loads(data)
+        action = request["action"]
+        topics = {
+            "event_types": [str(t) for t in request.get("event_types", [])],
+            "item_ids": [int(i) for i in request.get("item_ids", [])],
+            "sku_prefixes": [str(p) for p in request.get("sku_prefixes", [])],
+        }
+    except (ValueError, TypeError, KeyError, AttributeError):
+        manager.send_personal(websocket, {"type": "error", "data": {"message": "Invalid message"}})
+        return
+
+    if action == "subscribe":
+        subscriptions = manager.subscribe(websocket, **topics)
+    elif action == "unsubscribe":
+        subscriptions = manager.unsubscribe(websocket, **topics)
+    else:
+        manager.send_personal(websocket, {"type": "error", "data": {"message": f"Unknown action: {action}"}})
+        return
+    manager.send_personal(websocket, {"type": "subscriptions", "data": subscriptions})
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for real-time updates.
     Clients connect here to receive real-time notifications about items and transactions.
+    Without subscriptions a client receives every event; see
+    `_handle_client_message` for narrowing that down.
     """
     await manager.connect(websocket)
     try:
         while True:
-            # Keep connection alive and listen for messages from client
+            # Keep connection alive and listen for subscription messages from client
             data = await websocket.receive_text()
-            print(f"📨 Received from client: {data}")
-            # Currently just echo, can be extended for client->server messaging
+            _handle_client_message(websocket, data)
     except WebSocketDisconnect:
         print("Client disconnected")
         manager.disconnect(websocket)
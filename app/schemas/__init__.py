@@ -1,3 +1,17 @@
 from app.schemas.user import UserOut, UserCreate, Token, TokenData  # noqa
-from app.schemas.item import ItemRead, ItemCreate, ItemUpdate  # noqa
-from app.schemas.transaction import TransactionOut, TransactionCreate  # noqa
\ No newline at end of file
+from app.schemas.item import (  # noqa
+    ItemRead,
+    ItemCreate,
+    ItemUpdate,
+    ItemImportRow,
+    ItemImportError,
+    ItemImportReport,
+    StockAtRead,
+)
+from app.schemas.transaction import (  # noqa
+    TransactionOut,
+    TransactionCreate,
+    TransactionBatchCreate,
+    TransactionBatchOut,
+)
+from app.schemas.analytics import MovementPeriod, TopMover  # noqa
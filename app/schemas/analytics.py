@@ -0,0 +1,20 @@
+from datetime import date
+from pydantic import BaseModel
+
+
+class MovementPeriod(BaseModel):
+    item_id: int
+    period_start: date
+    quantity_in: int
+    quantity_out: int
+    transactions_in: int
+    transactions_out: int
+
+
+class TopMover(BaseModel):
+    item_id: int
+    sku: str
+    name: str
+    quantity_in: int
+    quantity_out: int
+    moved: int
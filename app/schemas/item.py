@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 class ItemBase(BaseModel):
     name: str
@@ -28,6 +31,47 @@ class ItemRead(BaseModel):
     quantity: int
     low_stock_threshold: int
     price: float
+    version: int
+    updated_at: datetime | None = None
 
     class Config:
-        from_attributes = True   # Pydantic v2 replacement for orm_mode
\ No newline at end of file
+        from_attributes = True   # Pydantic v2 replacement for orm_mode
+
+class ItemImportRow(BaseModel):
+    """One row of a bulk import; columns left out keep their current value."""
+    sku: str = Field(min_length=1)
+    name: str = Field(min_length=1)
+    description: str | None = None
+    quantity: int = Field(0, ge=0)
+    low_stock_threshold: int = Field(5, ge=0)
+    price: float = Field(0.0, ge=0)
+
+class ItemImportError(BaseModel):
+    line: int
+    sku: str | None = None
+    detail: str
+
+class ItemImportReport(BaseModel):
+    rows: int
+    created: int
+    updated: int
+    # Rows matching an existing item exactly; they are not written
+    unchanged: int
+    # Rows followed by a later row for the same SKU in the same chunk
+    superseded: int
+    failed: int
+    # At most ITEM_IMPORT_MAX_REPORTED_ERRORS, in file order
+    errors: list[ItemImportError]
+
+class StockAtRead(BaseModel):
+    item_id: int
+    sku: str
+    ts: datetime
+    quantity: int
+    # Where the answer was computed from: a snapshot, or the live quantity
+    basis: Literal["snapshot", "current"]
+    basis_at: datetime
+    transactions_applied: int
+    # Rolled back from a later quantity because no earlier snapshot exists;
+    # wrong by any quantity edit made without a transaction in between
+    approximate: bool
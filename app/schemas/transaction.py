@@ -1,5 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field
 
 
 class TransactionBase(BaseModel):
@@ -18,4 +19,21 @@ class TransactionOut(TransactionBase):
     created_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TransactionBatchCreate(BaseModel):
+    transactions: list[TransactionCreate] = Field(min_length=1, max_length=1000)
+    # "all_or_nothing" rejects the whole batch if any movement fails,
+    # "best_effort" applies what it can and reports the rest.
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+
+
+class TransactionBatchError(BaseModel):
+    index: int
+    item_id: int
+    detail: str
+
+
+class TransactionBatchOut(BaseModel):
+    transactions: list[TransactionOut]
+    errors: list[TransactionBatchError] = []
@@ -0,0 +1,89 @@
+# app/services/catalog_version.py
+"""
+Version counters and ETags for conditional GETs of items.
+
+Every item carries a `version` that any UPDATE bumps (see the model). The
+catalog-wide version is the sum of CATALOG_VERSION_SHARDS counters in
+`catalog_state`; every write to items bumps the shards of the items it
+touched with `bump_catalog_version`, in the same transaction, just before
+commit. Writers must call it: creates and deletes do not touch any surviving
+item's version, so only the catalog version reveals them. Every bump raises
+the sum, so it never repeats, and writes to items in different shards never
+wait on each other's counter.
+
+Reading either version is an index lookup, so `If-None-Match` can be
+answered with 304 before any item is loaded or serialized. The version is
+read before the rows it describes; a write committing in between only
+makes the ETag older than the body, which costs the client one extra full
+response, never a stale one.
+"""
+import hashlib
+from typing import Iterable
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.upsert import upsert
+from app.models.catalog_state import CatalogState
+
+
+async def bump_catalog_version(db: AsyncSession, item_ids: Iterable[int]) -> None:
+    """
+    Bump the catalog version for writes to `item_ids` in the current
+    transaction. The shard rows stay locked until commit, so call this
+    last, right before committing.
+    """
+    # Sessions don't autoflush: write pending item changes first, so every
+    # writer locks its item rows before any shard row, and shards are locked
+    # in ascending order, so no two writers deadlock
+    await db.flush()
+    shards = sorted({item_id % settings.CATALOG_VERSION_SHARDS for item_id in item_ids})
+    if not shards:
+        return
+    statement = upsert(db, CatalogState)
+    await db.execute(
+        statement.values([{"shard": shard, "version": 1} for shard in shards]).on_conflict_do_update(
+            index_elements=[CatalogState.shard],
+            set_={"version": CatalogState.version + 1},
+        )
+    )
+
+
+async def catalog_version(db: AsyncSession) -> int:
+    return await db.scalar(select(func.coalesce(func.sum(CatalogState.version), 0)))
+
+
+def catalog_etag(request: Request, version: int) -> str:
+    """Strong ETag of a catalog listing: the catalog version and the query string."""
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()[:16]
+    return f'"c{version}-{digest}"'
+
+
+def item_etag(item_id: int, version: int) -> str:
+    return f'"i{item_id}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether `If-None-Match` lists `etag` (compared weakly, as RFC 9110 requires)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in header.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    # Cacheable, but always revalidated
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,206 @@
+# app/services/droplet_metrics.py
+"""
+DigitalOcean droplet metrics for the manager health page.
+
+Every droplet needs three monitoring series (CPU, memory, disk), so a
+collection is the droplet list followed by all of those series fetched
+concurrently over one pooled HTTP client.
+
+Results are cached. A cached snapshot younger than
+`DO_METRICS_STALE_SECONDS` is served as is; an older one is still served
+immediately while a single background refresh replaces it. Only the very
+first request waits for the API.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DO_API_URL = "https://api.digitalocean.com/v2"
+
+
+def cpu_usage(series: List[dict]) -> float:
+    """CPU usage in percent from per-mode counters: 100 * (1 - idle delta / total delta)."""
+    mode_deltas = {}
+    # Collect the change over the window of each mode's counter
+    for s in series:
+        mode = s.get("metric", {}).get("mode")
+        values = s.get("values", [])
+        if mode and values and len(values) >= 2:
+            # Values are [timestamp, value] pairs
+            delta = float(values[-1][1]) - float(values[0][1])
+            if delta >= 0:
+                mode_deltas[mode] = delta
+
+    total_delta = sum(mode_deltas.values())
+    if total_delta <= 0:
+        return 0.0  # No activity detected
+    return round((1.0 - mode_deltas.get("idle", 0) / total_delta) * 100.0, 2)
+
+
+def memory_usage(series: List[dict], total_memory_mb: int) -> Optional[float]:
+    """Memory usage in percent from the latest memory_available sample (bytes)."""
+    if not series or not series[0].get("values"):
+        return None
+    available_bytes = float(series[0]["values"][-1][1])
+    total_bytes = total_memory_mb * 1024 * 1024
+    # Capped below at 0 in case of slight reporting errors
+    return round(max(0.0, (total_bytes - available_bytes) / total_bytes * 100.0), 2)
+
+
+def disk_usage(series: List[dict], total_disk_gb: int) -> float:
+    """Usage of the root filesystem in percent from the latest filesystem_free sample (bytes)."""
+    root = next((s for s in series if s.get("metric", {}).get("mountpoint") == "/"), None)
+    if not root or not root.get("values"):
+        return 0.0
+    free_bytes = float(root["values"][-1][1])
+    total_bytes = total_disk_gb * 1024 * 1024 * 1024
+    # The API may report slightly more free space than the droplet's size
+    return round(max(0.0, (total_bytes - free_bytes) / total_bytes) * 100.0, 2)
+
+
+class DropletMetricsCollector:
+    def __init__(
+        self,
+        token: str | None = None,
+        droplet_ids: List[str] | None = None,
+        stale_after: float = settings.DO_METRICS_STALE_SECONDS,
+        api_url: str = DO_API_URL,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.token = token
+        self.droplet_ids = [d.strip() for d in droplet_ids or [] if d.strip()]
+        self.stale_after = stale_after
+        self.api_url = api_url
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._snapshot: List[Dict[str, Any]] | None = None
+        self._fetched_at: float | None = None
+        self._fetched_at_wall: datetime | None = None
+        self._refresh: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if not self.token:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.api_url,
+            transport=self._transport,
+            timeout=settings.DO_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=settings.DO_HTTP_MAX_CONNECTIONS),
+            headers={"Authorization": f"Bearer {self.token}", "Content-Type": "application/json"},
+        )
+
+    async def stop(self) -> None:
+        if self._refresh:
+            self._refresh.cancel()
+            self._refresh = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self) -> Dict[str, Any]:
+        """The latest droplet metrics, refreshing them in the background when stale."""
+        if self._client is None:
+            return {"droplets": [], "fetched_at": None, "age_seconds": None}
+        if self._snapshot is None:
+            await self._refresh_once()
+        elif time.monotonic() - self._fetched_at > self.stale_after:
+            self._refresh_once()  # scheduled; not awaited
+        age = time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+        return {
+            "droplets": self._snapshot or [],
+            "fetched_at": self._fetched_at_wall.isoformat() if self._fetched_at_wall else None,
+            "age_seconds": round(age, 1) if age is not None else None,
+        }
+
+    def _refresh_once(self) -> asyncio.Task:
+        # Single flight: concurrent callers share the refresh in progress
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._collect())
+        return self._refresh
+
+    async def _collect(self) -> None:
+        try:
+            droplets = await self.collect()
+        except Exception as e:
+            logger.warning("Error fetching DigitalOcean metrics: %s", e)
+            if self._snapshot is None:
+                droplets = []
+            else:
+                return  # keep serving the previous snapshot
+        self._snapshot = droplets
+        self._fetched_at = time.monotonic()
+        self._fetched_at_wall = datetime.utcnow()
+
+    async def collect(self) -> List[Dict[str, Any]]:
+        """Fetch the configured droplets and all their series, concurrently."""
+        response = await self._client.get("/droplets")
+        response.raise_for_status()
+        all_droplets = response.json().get("droplets", [])
+
+        # Filter by configured IDs or get first droplet
+        if self.droplet_ids:
+            droplets = [d for d in all_droplets if str(d["id"]) in self.droplet_ids]
+        else:
+            droplets = all_droplets[:1]
+        return list(await asyncio.gather(*(self._droplet_metrics(d) for d in droplets)))
+
+    async def _droplet_metrics(self, droplet: dict) -> Dict[str, Any]:
+        total_memory_mb = droplet.get("memory", 0)  # Memory in MB
+        total_disk_gb = droplet.get("disk", 0)      # Disk in GB
+
+        # Time window required by the DO Monitoring API
+        end_time = int(time.time()) - 20
+        params = {"host_id": droplet["id"], "start": end_time - 100, "end": end_time}
+        cpu, memory, disk = await asyncio.gather(
+            self._series("cpu", params),
+            self._series("memory_available", {**params, "aggregate": "min"}) if total_memory_mb > 0 else _none(),
+            self._series("filesystem_free", {**params, "aggregate": "min"}) if total_disk_gb > 0 else _none(),
+            return_exceptions=True,
+        )
+
+        metrics = {
+            "droplet_id": droplet["id"],
+            "name": droplet.get("name", "Unknown"),
+            "status": droplet.get("status", "unknown"),
+            "memory_mb": total_memory_mb,
+            "vcpus": droplet.get("vcpus", 0),
+            "disk_gb": total_disk_gb,
+            "cpu_usage": None,
+            "memory_usage": 0.0,
+            "disk_usage": 0.0,
+        }
+        for field, series, compute in (
+            ("cpu_usage", cpu, cpu_usage),
+            ("memory_usage", memory, lambda s: memory_usage(s, total_memory_mb)),
+            ("disk_usage", disk, lambda s: disk_usage(s, total_disk_gb)),
+        ):
+            if isinstance(series, Exception):
+                logger.warning("Error fetching %s for droplet %s: %s", field, droplet["id"], series)
+                metrics[field] = None
+            elif series is not None:
+                metrics[field] = compute(series)
+        return metrics
+
+    async def _series(self, metric: str, params: dict) -> List[dict]:
+        response = await self._client.get(f"/monitoring/metrics/droplet/{metric}", params=params)
+        response.raise_for_status()
+        return response.json().get("data", {}).get("result", [])
+
+
+async def _none():
+    return None
+
+
+# Global instance
+droplet_metrics = DropletMetricsCollector(
+    token=settings.DIGITALOCEAN_TOKEN,
+    droplet_ids=settings.DIGITALOCEAN_DROPLET_IDS.split(","),
+)
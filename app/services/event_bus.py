@@ -0,0 +1,262 @@
+# app/services/event_bus.py
+"""
+Pluggable publish/subscribe backends for fanning events out across processes.
+
+The WebSocket manager publishes every event to the bus and delivers whatever
+the bus hands back to its own sockets, so with a shared backend an event
+raised in one uvicorn worker or replica reaches clients connected to all of
+them. Payloads are strings; each is published on a topic and delivered to
+every handler subscribed to that topic, in every process on the bus,
+including the publisher.
+
+Backends:
+- `InMemoryEventBus`: process local. Several buses may share one
+  `InMemoryHub` to stand in for separate processes in tests.
+- `PostgresEventBus`: LISTEN/NOTIFY on the application database (asyncpg).
+- `RedisEventBus`: Redis pub/sub (requires the optional `redis` package).
+"""
+import asyncio
+import inspect
+from abc import ABC, abstractmethod
+import logging
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], Awaitable[None] | None]
+
+
+class EventBus(ABC):
+    """Base class: topic multiplexing on top of a single backend channel."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, topic: str, payload: str) -> None:
+        """Deliver `payload` to the `topic` handlers of every process on the bus."""
+
+    async def _dispatch(self, topic: str, payload: str) -> None:
+        for handler in self._handlers.get(topic, ()):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Event bus handler for %s failed", topic)
+
+    @staticmethod
+    def _encode(topic: str, payload: str) -> str:
+        return f"{topic}\n{payload}"
+
+    @staticmethod
+    def _decode(message: str) -> tuple[str, str]:
+        topic, _, payload = message.partition("\n")
+        return topic, payload
+
+
+class InMemoryHub:
+    """Connects in-memory buses as if they were processes sharing a broker."""
+
+    def __init__(self):
+        self.buses: List["InMemoryEventBus"] = []
+
+
+class InMemoryEventBus(EventBus):
+    def __init__(self, hub: InMemoryHub | None = None):
+        super().__init__()
+        self.hub = hub or InMemoryHub()
+        self.hub.buses.append(self)
+
+    async def publish(self, topic: str, payload: str) -> None:
+        for bus in self.hub.buses:
+            await bus._dispatch(topic, payload)
+
+
+class PostgresEventBus(EventBus):
+    """
+    LISTEN/NOTIFY over two dedicated asyncpg connections (one listening, one
+    publishing). NOTIFY payloads are limited to 8000 bytes, so larger
+    messages are split into numbered chunks and reassembled by listeners;
+    notifications from one session arrive in order.
+    """
+
+    MAX_PAYLOAD_BYTES = 7900
+    # Characters per chunk; at worst 4 bytes each, still under the limit.
+    CHUNK_CHARS = 1900
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self, dsn: str, channel: str):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._partial: Dict[str, List[str]] = {}
+        self._reconnect_task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        import asyncpg
+
+        self._stopping = False
+        self._listen_conn = await asyncpg.connect(self.dsn)
+        self._listen_conn.add_termination_listener(self._on_terminated)
+        await self._listen_conn.add_listener(self.channel, self._on_notify)
+        self._publish_conn = await asyncpg.connect(self.dsn)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        await self._close_connections()
+
+    async def _close_connections(self) -> None:
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = self._publish_conn = None
+
+    def _on_terminated(self, conn) -> None:
+        if not self._stopping:
+            logger.warning("Event bus connection lost; reconnecting")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        self._stopping = True  # closing the surviving connection is expected
+        await self._close_connections()
+        self._partial.clear()
+        while True:
+            try:
+                await self.start()
+                return
+            except Exception as e:
+                logger.warning("Event bus reconnect failed: %s", e)
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    async def publish(self, topic: str, payload: str) -> None:
+        message = self._encode(topic, payload)
+        if len(message.encode()) <= self.MAX_PAYLOAD_BYTES:
+            notifications = [f"0|{message}"]
+        else:
+            message_id = uuid.uuid4().hex
+            chunks = [
+                message[i:i + self.CHUNK_CHARS] for i in range(0, len(message), self.CHUNK_CHARS)
+            ]
+            notifications = [
+                f"{message_id}:{n}:{len(chunks)}|{chunk}" for n, chunk in enumerate(chunks)
+            ]
+        async with self._publish_lock:
+            if self._publish_conn is None:
+                raise ConnectionError("Event bus is not connected")
+            for notification in notifications:
+                await self._publish_conn.execute("SELECT pg_notify($1, $2)", self.channel, notification)
+
+    def _on_notify(self, conn, pid, channel, notification: str) -> None:
+        header, _, body = notification.partition("|")
+        if header != "0":
+            message_id, n, total = header.split(":")
+            parts = self._partial.setdefault(message_id, [])
+            parts.append(body)
+            if len(parts) < int(total):
+                return
+            body = "".join(self._partial.pop(message_id))
+        asyncio.create_task(self._dispatch(*self._decode(body)))
+
+
+class RedisEventBus(EventBus):
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self, url: str, channel: str):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError("EVENT_BUS_BACKEND=redis requires the 'redis' package") from exc
+
+        self._redis = aioredis.from_url(self.url, decode_responses=True)
+        await self._subscribe()
+        self._reader = asyncio.create_task(self._read())
+
+    async def _subscribe(self) -> None:
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+
+    async def stop(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+        if self._redis:
+            await self._redis.aclose()
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._dispatch(*self._decode(message["data"]))
+                logger.warning("Event bus subscription ended; resubscribing")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event bus connection lost: %s; reconnecting", e)
+            await self._resubscribe()
+
+    async def _resubscribe(self) -> None:
+        """Replace the subscription, retrying until Redis is back."""
+        while True:
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            try:
+                await self._subscribe()
+                return
+            except Exception as e:
+                logger.warning("Event bus reconnect failed: %s", e)
+
+    async def publish(self, topic: str, payload: str) -> None:
+        await self._redis.publish(self.channel, self._encode(topic, payload))
+
+
+def create_event_bus() -> EventBus:
+    """Build the bus selected by `EVENT_BUS_BACKEND`."""
+    backend = settings.EVENT_BUS_BACKEND
+    if backend == "postgres":
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        return PostgresEventBus(dsn.render_as_string(hide_password=False), settings.EVENT_BUS_CHANNEL)
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            raise ValueError("EVENT_BUS_BACKEND=redis requires REDIS_URL")
+        return RedisEventBus(settings.REDIS_URL, settings.EVENT_BUS_CHANNEL)
+    return InMemoryEventBus()
+
+
+# Global instance, shared by everything that fans events out across processes
+event_bus = create_event_bus()
@@ -0,0 +1,115 @@
+# app/services/idempotency.py
+"""
+Idempotency keys for stock movement POSTs.
+
+A client that may retry a POST (e.g. a scanner on flaky Wi-Fi) sends an
+`Idempotency-Key` header. The first request to commit stores its response
+under (user, key) in the same database transaction as the stock change, via
+the `before_commit` hook of the transaction service; a retry finds it and
+gets the stored response back without touching stock. Two copies of a
+request racing each other both run, but the unique constraint lets only one
+commit; the other rolls back and replays the winner's response.
+
+Failed requests are not stored, since they changed nothing. Stored
+responses are kept for at least IDEMPOTENCY_KEY_TTL_SECONDS and then
+deleted by `IdempotencyKeyCleanup`.
+"""
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+def request_fingerprint(endpoint: str, body: BaseModel) -> str:
+    return hashlib.sha256(f"{endpoint}\n{body.model_dump_json()}".encode()).hexdigest()
+
+
+async def find_response(db: AsyncSession, user_id: int, key: str) -> IdempotencyKey | None:
+    return await db.scalar(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+    )
+
+
+def remember_response(
+    db: AsyncSession, user_id: int, key: str, fingerprint: str, body: BaseModel, status_code: int = 200
+) -> None:
+    """Add the response to the session; it is committed with the change it describes."""
+    db.add(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        status_code=status_code,
+        response_body=body.model_dump_json(),
+    ))
+
+
+def replay(stored: IdempotencyKey, fingerprint: str) -> Response:
+    if stored.fingerprint != fingerprint:
+        raise HTTPException(
+            status_code=422, detail="Idempotency-Key was already used for a different request"
+        )
+    return Response(
+        content=stored.response_body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+class IdempotencyKeyCleanup:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl: float = settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+        interval: float = settings.IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        async with self.session_factory() as db:
+            result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+            await db.commit()
+        if result.rowcount:
+            logger.info("Deleted %d expired idempotency keys", result.rowcount)
+        return result.rowcount
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Idempotency key cleanup failed")
+            await asyncio.sleep(self.interval)
+
+
+# Global instance
+idempotency_cleanup = IdempotencyKeyCleanup()
@@ -1,11 +1,12 @@
 # app/services/inventory_service.py
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from app.models.item import Item
+from app.services.catalog_version import bump_catalog_version
 from app.services.notifications import notify_low_stock
 
-def adjust_stock(db: Session, item_id: int, delta: int) -> Item:
-    item = db.query(Item).get(item_id)
+async def adjust_stock(db: AsyncSession, item_id: int, delta: int) -> Item:
+    item = await db.get(Item, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
 
@@ -14,8 +15,9 @@ def adjust_stock(db: Session, item_id: int, delta: int) -> Item:
         raise HTTPException(status_code=400, detail="Insufficient stock")
 
     item.quantity = new_qty
-    db.commit()
-    db.refresh(item)
+    await bump_catalog_version(db, [item.id])
+    await db.commit()
+    await db.refresh(item)
 
     if item.quantity <= item.low_stock_threshold:
         notify_low_stock(item)  # hook for real-time + notification
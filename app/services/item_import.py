@@ -0,0 +1,230 @@
+# app/services/item_import.py
+"""
+Bulk item import from CSV or JSON Lines, upserted by SKU.
+
+Rows are parsed and validated (`ItemImportRow`) one chunk at a time, and
+each chunk is written with set-based INSERT ... ON CONFLICT (sku) DO UPDATE
+statements and committed on its own, so memory use and lock time stay
+bounded however large the file is. Reading, parsing and validating a chunk
+happens in the threadpool, so a large file does not stall the event loop. On
+Postgres a chunk is COPYed into a temporary staging table first and upserted
+from there in one statement.
+
+Only columns present in the file are updated. An existing item is only
+rewritten when a value actually changes, so re-importing the same catalog
+leaves versions (and ETags) alone. The last row for a SKU wins. Invalid rows
+are skipped and reported by line number; the rest are imported. A chunk the
+database rejects is retried row by row, so only the offending rows fail.
+"""
+import csv
+import io
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import IO, Iterator, List
+
+import orjson
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Float, Integer, Text, column, func, or_, select, table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.upsert import upsert
+from app.models.item import Item
+from app.schemas.item import ItemImportRow
+from app.services.catalog_version import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+IMPORT_COLUMNS = list(ItemImportRow.model_fields)
+REQUIRED_COLUMNS = [name for name, info in ItemImportRow.model_fields.items() if info.is_required()]
+
+STAGING_TABLE = "item_import_staging"
+_STAGING_TYPES = {"quantity": Integer, "low_stock_threshold": Integer, "price": Float}
+staging = table(STAGING_TABLE, *(column(name, _STAGING_TYPES.get(name, Text)) for name in IMPORT_COLUMNS))
+
+
+class ImportFormatError(ValueError):
+    """Raised when a file cannot be imported at all (e.g. missing CSV columns)."""
+    pass
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    superseded: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def reject(self, line: int, sku: str | None, detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.ITEM_IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "sku": sku, "detail": detail})
+
+
+def _csv_records(stream: IO[bytes]) -> Iterator[tuple[int, dict | None, str | None]]:
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    missing = [name for name in REQUIRED_COLUMNS if name not in (reader.fieldnames or [])]
+    if missing:
+        raise ImportFormatError(f"CSV header is missing column(s): {', '.join(missing)}")
+    line = reader.line_num
+    records = iter(reader)
+    while True:
+        start = line + 1
+        try:
+            record = next(records)
+        except StopIteration:
+            return
+        except (csv.Error, UnicodeDecodeError) as exc:
+            # The reader cannot resynchronise; report and stop here
+            yield start, None, f"Unreadable CSV, import stopped: {exc}"
+            return
+        line = reader.line_num
+        if None in record:
+            yield start, None, "More values than header columns"
+            continue
+        # An empty cell means "not given", like a key left out of a JSON line
+        yield start, {key: value for key, value in record.items() if value not in ("", None)}, None
+
+
+def _ndjson_records(stream: IO[bytes]) -> Iterator[tuple[int, dict | None, str | None]]:
+    for line, raw in enumerate(stream, 1):
+        if not raw.strip():
+            continue
+        try:
+            record = orjson.loads(raw)
+        except orjson.JSONDecodeError as exc:
+            yield line, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line, None, "Expected a JSON object"
+            continue
+        yield line, record, None
+
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def _copy_to_staging(db: AsyncSession, values: list[dict]) -> None:
+    await db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ("
+        "sku text, name text, description text, quantity integer,"
+        " low_stock_threshold integer, price double precision"
+        ") ON COMMIT DELETE ROWS"
+    ))
+    # Several groups may be staged in one transaction
+    await db.execute(text(f"TRUNCATE {STAGING_TABLE}"))
+    # The statements above opened the transaction the COPY joins
+    raw = await (await db.connection()).get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STAGING_TABLE,
+        records=[tuple(row[name] for name in IMPORT_COLUMNS) for row in values],
+        columns=IMPORT_COLUMNS,
+    )
+
+
+async def _upsert_group(db: AsyncSession, values: list[dict], provided: frozenset) -> dict[str, int]:
+    """Upsert rows that all give the same columns; returns the ids written, by SKU."""
+    if db.bind.dialect.name == "postgresql":
+        await _copy_to_staging(db, values)
+        statement = postgresql.insert(Item).from_select(IMPORT_COLUMNS, select(*staging.c))
+        params = None
+    else:
+        statement = upsert(db, Item)
+        params = values
+
+    updated = [name for name in IMPORT_COLUMNS if name in provided and name != "sku"]
+    # ON CONFLICT updates skip the model's onupdate defaults, so set them here
+    statement = statement.on_conflict_do_update(
+        index_elements=[Item.sku],
+        set_={
+            **{name: statement.excluded[name] for name in updated},
+            "version": Item.version + 1,
+            "updated_at": func.now(),
+        },
+        where=or_(*(Item.__table__.c[name].is_distinct_from(statement.excluded[name]) for name in updated)),
+    ).returning(Item.sku, Item.id)
+    return dict((await db.execute(statement, params)).all())
+
+
+def _read_chunk(
+    records: Iterator[tuple[int, dict | None, str | None]], chunk_size: int, report: ImportReport
+) -> tuple[dict[str, tuple[int, ItemImportRow]], bool]:
+    """
+    Parse and validate rows until `chunk_size` distinct SKUs are collected.
+    Blocking; run it in the threadpool. Returns the chunk, keyed by SKU, and
+    whether the file is exhausted.
+    """
+    # SKU -> (line, row); a later row for the same SKU replaces the earlier one
+    chunk: dict[str, tuple[int, ItemImportRow]] = {}
+    for line, record, error in records:
+        report.rows += 1
+        if error is None:
+            try:
+                row = ItemImportRow.model_validate(record)
+            except ValidationError as exc:
+                error = _validation_detail(exc)
+        if error is not None:
+            sku = record.get("sku") if record else None
+            report.reject(line, None if sku is None else str(sku), error)
+            continue
+        if row.sku in chunk:
+            report.superseded += 1
+            del chunk[row.sku]
+        chunk[row.sku] = (line, row)
+        if len(chunk) >= chunk_size:
+            return chunk, False
+    return chunk, True
+
+
+async def _write_chunk(db: AsyncSession, rows: dict[str, tuple[int, ItemImportRow]], report: ImportReport) -> None:
+    existing = set(await db.scalars(select(Item.sku).where(Item.sku.in_(list(rows)))))
+    groups = defaultdict(list)
+    for _, row in rows.values():
+        groups[frozenset(row.model_fields_set)].append(row.model_dump())
+    try:
+        written = {}
+        for provided, values in groups.items():
+            written.update(await _upsert_group(db, values, provided))
+        await bump_catalog_version(db, written.values())
+        await db.commit()
+    except DBAPIError as exc:
+        await db.rollback()
+        if len(rows) > 1:
+            logger.warning("Item import chunk of %d rows rejected, retrying row by row: %s", len(rows), exc.orig)
+            for sku, entry in rows.items():
+                await _write_chunk(db, {sku: entry}, report)
+            return
+        line, row = next(iter(rows.values()))
+        report.reject(line, row.sku, f"Rejected by the database: {exc.orig}")
+        return
+    report.created += len(written.keys() - existing)
+    report.updated += len(written.keys() & existing)
+    report.unchanged += len(rows) - len(written)
+
+
+async def import_item_file(
+    db: AsyncSession,
+    stream: IO[bytes],
+    format: str,
+    chunk_size: int = settings.ITEM_IMPORT_CHUNK_SIZE,
+) -> ImportReport:
+    """Validate and upsert every row of `stream` ("csv" or "ndjson")."""
+    records = _csv_records(stream) if format == "csv" else _ndjson_records(stream)
+    report = ImportReport()
+    done = False
+    while not done:
+        chunk, done = await run_in_threadpool(_read_chunk, records, chunk_size, report)
+        if chunk:
+            await _write_chunk(db, chunk, report)
+    return report
@@ -0,0 +1,112 @@
+# app/services/metrics.py
+"""
+Prometheus metrics.
+
+Request counters and latency histograms are recorded by `MetricsMiddleware`,
+labelled by route template (e.g. `/items/{item_id}`), method and status, so
+label cardinality stays bounded. Gauges that describe current state (DB
+pool, WebSocket connections, broadcast queues, password hashing) are read
+when Prometheus scrapes rather than maintained on every request.
+
+Each worker process keeps its own values; scrape every process (or run one
+worker per container) when running several.
+"""
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.db.database import pool_stats
+from app.services.password_hasher import password_hasher
+from app.services.websocket_manager import manager
+
+HTTP_REQUESTS = Counter(
+    "ims_http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "ims_http_request_duration_seconds",
+    "Time to handle an HTTP request, until the response is fully sent",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+EMAIL_SEND_DURATION = Histogram(
+    "ims_email_send_duration_seconds",
+    "Time to post one notification to the email function",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+class _StateCollector(Collector):
+    def collect(self):
+        pool = pool_stats()
+        for key, help_text in (
+            ("checked_out", "Connections currently checked out of the pool"),
+            ("checked_in", "Idle connections in the pool"),
+            ("overflow", "Connections open beyond pool_size (negative while filling up)"),
+            ("capacity", "pool_size + max_overflow"),
+        ):
+            if key in pool:
+                yield GaugeMetricFamily(f"ims_db_pool_{key}", help_text, value=pool[key])
+        if "checkouts" in pool:
+            yield GaugeMetricFamily("ims_db_pool_checkouts", "Checkouts since start", value=pool["checkouts"])
+            yield GaugeMetricFamily("ims_db_pool_timeouts", "Checkouts that timed out since start", value=pool["timeouts"])
+
+        yield GaugeMetricFamily(
+            "ims_websocket_connections", "Open WebSocket connections", value=len(manager.active_connections)
+        )
+        yield GaugeMetricFamily(
+            "ims_websocket_send_queue_depth", "Broadcast messages waiting in send queues", value=manager.queue_depth()
+        )
+        yield GaugeMetricFamily(
+            "ims_password_hash_pending", "Password hashes running or queued", value=password_hasher.pending
+        )
+
+
+REGISTRY.register(_StateCollector())
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: records every HTTP request and answers `path`
+    with the metrics in Prometheus text format.
+    """
+
+    def __init__(self, app, path: str = "/metrics"):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"] == self.path:
+            body = generate_latest(REGISTRY)
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", CONTENT_TYPE_LATEST.encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"), str(status))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started)
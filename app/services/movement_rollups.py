@@ -0,0 +1,155 @@
+# app/services/movement_rollups.py
+"""
+Daily per-item movement rollups.
+
+`record_movements` folds newly inserted ledger rows into `movement_rollups`
+with one upsert per call; the stock change functions call it before they
+commit, so rollups and ledger always change together. `rebuild` recomputes
+them from the ledger for existing history (see app/db/backfill_rollups.py).
+
+Analytics read only the rollups, so their cost grows with days x items
+touched, not with the number of transactions. Days are UTC days, whatever
+the database session's time zone.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import upsert
+from app.models.item import Item
+from app.models.movement_rollup import MovementRollup
+from app.models.transaction import Transaction, TransactionType
+
+COUNTERS = ("quantity_in", "quantity_out", "transactions_in", "transactions_out")
+
+
+def utc_day(created_at: datetime) -> date:
+    """The UTC day of a ledger timestamp (naive values are already UTC)."""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+async def record_movements(db: AsyncSession, transactions: Iterable[Transaction]) -> None:
+    """Add inserted (not yet committed) ledger rows to their items' daily rollups."""
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for tx in transactions:
+        row = totals[(tx.item_id, utc_day(tx.created_at))]
+        direction = "in" if tx.type == TransactionType.IN else "out"
+        row[f"quantity_{direction}"] += tx.quantity
+        row[f"transactions_{direction}"] += 1
+    if not totals:
+        return
+
+    rows = [{"item_id": item_id, "day": day, **counters} for (item_id, day), counters in totals.items()]
+    statement = upsert(db, MovementRollup)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[MovementRollup.item_id, MovementRollup.day],
+            set_={name: getattr(MovementRollup, name) + getattr(statement.excluded, name) for name in COUNTERS},
+        ),
+        rows,
+    )
+
+
+async def rebuild(db: AsyncSession, since: date | None = None) -> int:
+    """
+    Recompute rollups from the ledger, from `since` (or the beginning) on,
+    and commit. Returns the number of rollup rows written.
+    """
+    if db.bind.dialect.name == "postgresql":
+        # Hold off stock changes so none lands between the delete and the re-insert
+        await db.execute(text("LOCK TABLE transactions IN SHARE MODE"))
+
+    created_at = Transaction.created_at
+    start = None if since is None else datetime.combine(since, time.min)
+    if db.bind.dialect.name == "postgresql":
+        # created_at is a timestamptz there; without this, date() and the
+        # comparison with `since` would follow the session's TimeZone
+        created_at = func.timezone("UTC", created_at)
+        start = None if start is None else start.replace(tzinfo=timezone.utc)
+    day = func.date(created_at)
+    is_in = Transaction.type == TransactionType.IN
+    grouped = select(
+        Transaction.item_id,
+        day,
+        func.sum(case((is_in, Transaction.quantity), else_=0)),
+        func.sum(case((is_in, 0), else_=Transaction.quantity)),
+        func.sum(case((is_in, 1), else_=0)),
+        func.sum(case((is_in, 0), else_=1)),
+    ).group_by(Transaction.item_id, day)
+
+    clear = delete(MovementRollup)
+    if since is not None:
+        grouped = grouped.where(Transaction.created_at >= start)
+        clear = clear.where(MovementRollup.day >= since)
+
+    await db.execute(clear)
+    result = await db.execute(
+        insert(MovementRollup).from_select(["item_id", "day", *COUNTERS], grouped)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def movements(
+    db: AsyncSession,
+    since: date,
+    until: date,
+    granularity: str = "day",
+    item_id: int | None = None,
+) -> list[dict]:
+    """IN/OUT totals per item and day (or ISO week, starting Monday) in [since, until]."""
+    query = (
+        select(MovementRollup)
+        .where(MovementRollup.day >= since, MovementRollup.day <= until)
+        .order_by(MovementRollup.day, MovementRollup.item_id)
+    )
+    if item_id is not None:
+        query = query.where(MovementRollup.item_id == item_id)
+
+    periods = {}
+    for rollup in await db.scalars(query):
+        start = rollup.day if granularity == "day" else rollup.day - timedelta(days=rollup.day.weekday())
+        period = periods.setdefault(
+            (start, rollup.item_id),
+            {"item_id": rollup.item_id, "period_start": start, **dict.fromkeys(COUNTERS, 0)},
+        )
+        for name in COUNTERS:
+            period[name] += getattr(rollup, name)
+    return list(periods.values())
+
+
+async def top_movers(
+    db: AsyncSession,
+    since: date,
+    until: date,
+    direction: str = "out",
+    limit: int = 10,
+) -> list[dict]:
+    """Items with the most units moved in `direction` ("in", "out" or "total") in [since, until]."""
+    quantity_in = func.sum(MovementRollup.quantity_in)
+    quantity_out = func.sum(MovementRollup.quantity_out)
+    moved = {"in": quantity_in, "out": quantity_out, "total": quantity_in + quantity_out}[direction]
+    totals = (
+        select(
+            MovementRollup.item_id,
+            quantity_in.label("quantity_in"),
+            quantity_out.label("quantity_out"),
+            moved.label("moved"),
+        )
+        .where(MovementRollup.day >= since, MovementRollup.day <= until)
+        .group_by(MovementRollup.item_id)
+        .order_by(moved.desc(), MovementRollup.item_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = await db.execute(
+        select(totals, Item.sku, Item.name)
+        .join(Item, Item.id == totals.c.item_id)
+        .order_by(totals.c.moved.desc(), totals.c.item_id)
+    )
+    return [dict(row._mapping) for row in rows]
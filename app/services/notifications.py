@@ -1,7 +1,26 @@
 # app/services/notifications.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.item import Item
+from app.models.notification import NotificationOutbox
+
+EMAIL_KIND = "email"
 
 def notify_low_stock(item: Item) -> None:
     # This is a stub that others can implement.
     # For now you can just log, or publish to Redis, or send to WebSocket manager.
-    print(f"[LOW STOCK] Item {item.sku} - {item.name} has quantity {item.quantity}")
\ No newline at end of file
+    print(f"[LOW STOCK] Item {item.sku} - {item.name} has quantity {item.quantity}")
+
+def enqueue_low_stock_email(db: AsyncSession, item: Item) -> None:
+    """
+    Queue a low stock email in the notification outbox.
+
+    Nothing is sent here: the row is committed with the caller's transaction
+    and delivered by the outbox worker.
+    """
+    db.add(NotificationOutbox(
+        kind=EMAIL_KIND,
+        payload={
+            "subject": f"Low Stock Alert - {item.name}",
+            "text": f"⚠️ Low stock alert: {item.name} - {item.sku} has only {item.quantity} left!",
+        },
+    ))
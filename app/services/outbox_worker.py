@@ -0,0 +1,207 @@
+# app/services/outbox_worker.py
+"""
+Background worker that delivers queued notifications from the outbox table.
+
+Request handlers only insert outbox rows (see `app.services.notifications`);
+this worker claims due rows in batches, posts them to the serverless email
+function over a pooled HTTP client and records the outcome. Failed
+deliveries are retried with exponential backoff until `OUTBOX_MAX_ATTEMPTS`.
+
+No transaction is held open while sending. A batch is claimed by pushing its
+`next_attempt_at` out by OUTBOX_LEASE_SECONDS and committing, which hides it
+from other replicas; the outcomes are then written in a second short
+transaction. If the worker dies in between, the lease runs out and the rows
+are delivered again, so delivery is at least once. Delivered rows are
+deleted after OUTBOX_SENT_RETENTION_SECONDS.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, select, update
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.notification import NotificationOutbox, OutboxStatus
+from app.services.metrics import EMAIL_SEND_DURATION
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        email_url: str | None = None,
+        api_key: str | None = None,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        poll_interval: float = settings.OUTBOX_POLL_INTERVAL_SECONDS,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base: float = settings.OUTBOX_RETRY_BASE_SECONDS,
+        retry_max: float = settings.OUTBOX_RETRY_MAX_SECONDS,
+        lease: float = settings.OUTBOX_LEASE_SECONDS,
+        sent_retention: float = settings.OUTBOX_SENT_RETENTION_SECONDS,
+        cleanup_interval: float = settings.OUTBOX_CLEANUP_INTERVAL_SECONDS,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.session_factory = session_factory
+        self.email_url = email_url
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.sent_retention = sent_retention
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = 0.0
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        if not self.email_url:
+            logger.warning("SERVERLESS_EMAIL_URL is not set; queued notifications will not be sent")
+            return
+        self.open_client()
+        self._task = asyncio.create_task(self._run())
+
+    def open_client(self) -> None:
+        """Create the pooled HTTP client; `start` does this before polling."""
+        self._client = httpx.AsyncClient(
+            transport=self._transport,
+            timeout=settings.EMAIL_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=self.batch_size, max_keepalive_connections=10),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def wake(self) -> None:
+        """Deliver newly committed notifications now instead of at the next poll."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                delivered = await self.drain_once()
+            except Exception:
+                logger.exception("Outbox drain failed")
+                delivered = 0
+            if time.monotonic() >= self._next_cleanup:
+                self._next_cleanup = time.monotonic() + self.cleanup_interval
+                try:
+                    await self.delete_sent()
+                except Exception:
+                    logger.exception("Outbox cleanup failed")
+            if delivered >= self.batch_size:
+                continue  # more rows are probably due
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _backoff(self, attempts: int) -> timedelta:
+        delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    async def drain_once(self) -> int:
+        """Claim one batch of due notifications, deliver them and record the results."""
+        rows = await self._claim()
+        if not rows:
+            return 0
+
+        results = await asyncio.gather(
+            *(self._deliver(row) for row in rows), return_exceptions=True
+        )
+
+        finished_at = datetime.utcnow()
+        async with self.session_factory() as db:
+            for row, result in zip(rows, results):
+                attempts = row.attempts + 1
+                if result is None:
+                    values = {"status": OutboxStatus.sent.value, "sent_at": finished_at, "last_error": None}
+                elif attempts >= self.max_attempts:
+                    values = {"status": OutboxStatus.failed.value, "last_error": str(result)[:500]}
+                    logger.error("Giving up on notification %s: %s", row.id, result)
+                else:
+                    values = {
+                        "next_attempt_at": finished_at + self._backoff(attempts),
+                        "last_error": str(result)[:500],
+                    }
+                    logger.warning("Notification %s failed (attempt %s): %s", row.id, attempts, result)
+                await db.execute(
+                    update(NotificationOutbox)
+                    .where(NotificationOutbox.id == row.id)
+                    .values(attempts=attempts, **values)
+                )
+            await db.commit()
+        return len(rows)
+
+    async def _claim(self) -> list[NotificationOutbox]:
+        """Lease a batch of due rows to this worker, in a transaction of its own."""
+        async with self.session_factory() as db:
+            now = datetime.utcnow()
+            rows = (await db.scalars(
+                select(NotificationOutbox)
+                .where(
+                    NotificationOutbox.status == OutboxStatus.pending.value,
+                    NotificationOutbox.next_attempt_at <= now,
+                )
+                .order_by(NotificationOutbox.id)
+                .limit(self.batch_size)
+                # Replicas claiming at the same moment skip each other's rows
+                .with_for_update(skip_locked=True)
+            )).all()
+            for row in rows:
+                row.next_attempt_at = now + timedelta(seconds=self.lease)
+            await db.commit()
+            return rows
+
+    async def delete_sent(self) -> int:
+        """Delete rows delivered more than `sent_retention` seconds ago."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.sent_retention)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                delete(NotificationOutbox).where(
+                    NotificationOutbox.status == OutboxStatus.sent.value,
+                    NotificationOutbox.sent_at < cutoff,
+                )
+            )
+            await db.commit()
+        if result.rowcount:
+            logger.info("Deleted %d delivered notifications", result.rowcount)
+        return result.rowcount
+
+    async def _deliver(self, row: NotificationOutbox) -> None:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._client.post(self.email_url, json=row.payload)
+            response.raise_for_status()
+            outcome = "sent"
+        finally:
+            EMAIL_SEND_DURATION.labels(outcome).observe(time.perf_counter() - started)
+
+
+# Global instance
+outbox_worker = OutboxWorker(
+    email_url=settings.SERVERLESS_EMAIL_URL,
+    api_key=settings.EMAIL_API_KEY,
+)
@@ -0,0 +1,106 @@
+# app/services/password_hasher.py
+"""
+Bounded worker pool for bcrypt.
+
+A bcrypt hash takes a few hundred milliseconds of CPU. Running it on the
+anyio threadpool lets a burst of logins (shift change) occupy the threads
+every other request needs, so hashing gets its own small pool instead.
+bcrypt releases the GIL while it works, so threads run hashes in parallel.
+
+Requests beyond `max_pending` (running plus queued) are refused with
+`PasswordHasherBusy` rather than queued without bound; routes answer 503.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.security import pwd_context
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING,
+        context: CryptContext = pwd_context,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.context = context
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.pending = 0
+        self.completed: Dict[str, int] = {"hash": 0, "verify": 0}
+        self.rejected = 0
+        self.rehashed = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, str | None]:
+        """
+        Check a password. When it matches but was hashed with other settings
+        (e.g. a changed BCRYPT_ROUNDS), also return a replacement hash.
+        """
+        ok, new_hash = await self._run("verify", self.context.verify_and_update, password, hashed)
+        if new_hash is not None:
+            self.rehashed += 1
+        return ok, new_hash
+
+    async def _run(self, operation: str, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Password hashing saturated (%d pending); rejecting request", self.pending)
+            raise PasswordHasherBusy()
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            return fn(*args), started - submitted, time.perf_counter() - started
+
+        self.pending += 1
+        try:
+            result, waited, ran = await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+        self.completed[operation] += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.hash_seconds += ran
+        return result
+
+    def stats(self) -> dict:
+        done = sum(self.completed.values())
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queued": max(self.pending - self.workers, 0),
+            "completed": dict(self.completed),
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "avg_wait_ms": round(self.wait_seconds / done * 1000, 2) if done else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "avg_hash_ms": round(self.hash_seconds / done * 1000, 2) if done else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+password_hasher = PasswordHasher()
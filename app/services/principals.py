@@ -0,0 +1,160 @@
+# app/services/principals.py
+"""
+Cache of authenticated principals, so most requests authorize without a
+users lookup.
+
+Access tokens carry the user's `token_version`; a resolved principal is
+cached under (user id, token version) for a short TTL. Changing a user's
+role, password or active flag bumps the version, which revokes outstanding
+tokens, and every committed change to a user evicts it from the cache here
+and, through the event bus, in every other process.
+
+A token whose role claim is fresh (issued within
+`AUTH_ROLE_CLAIM_MAX_AGE_SECONDS`, and after the user was last changed as
+far as this process knows) is authorized from its claims without any lookup.
+That record of changes is kept in memory, per process, and only for as long
+as a claim stays fresh: it is lost on restart, and another worker only
+learns of a change if the event bus delivers it. Within that window the
+token version and users lookup are the only guarantee that a change took
+effect.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.user import User, UserRole
+from app.services.event_bus import EventBus, event_bus
+
+BUS_TOPIC = "principal_invalidated"
+# Changing any of these revokes the user's outstanding tokens.
+REVOKING_ATTRIBUTES = ("role", "is_active", "hashed_password")
+_CHANGED_USERS_KEY = "principals_changed_user_ids"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, as seen by route handlers."""
+    id: int
+    role: UserRole
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, role=UserRole(user.role), token_version=user.token_version or 0)
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        maxsize: int = settings.AUTH_PRINCIPAL_CACHE_SIZE,
+        ttl: float = settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+        role_claim_max_age: float = settings.AUTH_ROLE_CLAIM_MAX_AGE_SECONDS,
+        bus: EventBus | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.role_claim_max_age = role_claim_max_age
+        self._entries: "OrderedDict[tuple[int, int], tuple[Principal, float]]" = OrderedDict()
+        # Wall-clock time each user was last invalidated, compared with token
+        # "iat"; oldest first, and only as far back as role_claim_max_age
+        self._invalidated_at: Dict[int, float] = {}
+        self._pending: Set[asyncio.Task] = set()
+        self.bus = bus
+        if bus is not None:
+            bus.subscribe(BUS_TOPIC, self._on_bus_message)
+
+    def get(self, user_id: int, token_version: int) -> Principal | None:
+        key = (user_id, token_version)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(self, principal: Principal) -> Principal:
+        key = (principal.id, principal.token_version)
+        self._entries[key] = (principal, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return principal
+
+    def from_claims(self, claims: dict) -> Principal | None:
+        """Build a principal from a token's claims if its role claim is fresh enough to trust."""
+        user_id, issued_at, role = int(claims["sub"]), claims.get("iat"), claims.get("role")
+        if issued_at is None or role not in UserRole.__members__:
+            return None
+        if time.time() - issued_at > self.role_claim_max_age:
+            return None
+        # "iat" has one-second resolution; a tie counts as issued before the change
+        if self._invalidated_at.get(user_id, 0) >= issued_at:
+            return None
+        return Principal(id=user_id, role=UserRole(role), token_version=claims.get("ver", 0))
+
+    def invalidate(self, user_id: int, publish: bool = True) -> None:
+        """Forget a user here and, if `publish`, in every process on the bus."""
+        now = time.time()
+        self._invalidated_at.pop(user_id, None)
+        self._invalidated_at[user_id] = now
+        # Tokens issued before an older entry fail the max age check anyway
+        while self._invalidated_at:
+            oldest, invalidated_at = next(iter(self._invalidated_at.items()))
+            if invalidated_at >= now - self.role_claim_max_age:
+                break
+            del self._invalidated_at[oldest]
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+        if publish and self.bus is not None:
+            try:
+                task = asyncio.get_running_loop().create_task(self.bus.publish(BUS_TOPIC, str(user_id)))
+            except RuntimeError:
+                return  # no event loop (e.g. init_db at startup); nothing else to tell
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._invalidated_at.clear()
+
+    def _on_bus_message(self, payload: str) -> None:
+        self.invalidate(int(payload), publish=False)
+
+
+# Global instance
+principal_cache = PrincipalCache(bus=event_bus)
+
+
+@event.listens_for(User, "before_update")
+def _bump_token_version(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in REVOKING_ATTRIBUTES):
+        target.token_version = (target.token_version or 0) + 1
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _remember_changed_user(mapper, connection, target):
+    object_session(target).info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+# Evict only once the change is committed; evicting earlier would let a
+# concurrent request re-cache the old row.
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(_CHANGED_USERS_KEY, None)
@@ -0,0 +1,140 @@
+# app/services/service_logs.py
+"""
+Live Docker service logs for the manager health page.
+
+Each service has at most one follow-mode reader (`docker service logs
+--follow`, or `docker logs --follow` outside Swarm), started the first time
+anyone asks for that service. Its lines go into a bounded ring buffer, which
+answers tail requests without forking anything, and are fanned out to every
+live subscriber through a bounded queue per subscriber.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, List, Sequence, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Swarm services (stackname_service) the health page may show
+DOCKER_SERVICES = ["ims_stack_api", "ims_stack_db", "ims_stack_frontend"]
+
+
+class ServiceLogFollower:
+    RESTART_DELAY_SECONDS = 5.0
+
+    def __init__(
+        self,
+        service: str,
+        buffer_lines: int = settings.LOG_BUFFER_LINES,
+        subscriber_queue_size: int = settings.LOG_SUBSCRIBER_QUEUE_SIZE,
+        command: Sequence[str] | None = None,
+    ):
+        self.service = service
+        self.buffer: deque[str] = deque(maxlen=buffer_lines)
+        self.subscriber_queue_size = subscriber_queue_size
+        # Fixed command (tests); otherwise chosen per Docker mode on start
+        self._command = list(command) if command else None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._process: asyncio.subprocess.Process | None = None
+        self._ready = asyncio.Event()
+
+    def ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+
+    async def tail(self, lines: int, wait: float = settings.LOG_TAIL_WAIT_SECONDS) -> List[str]:
+        """The last `lines` lines, waiting briefly for a reader that just started."""
+        self.ensure_started()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=wait)
+        except asyncio.TimeoutError:
+            pass
+        return list(self.buffer)[-lines:] if lines > 0 else []
+
+    def subscribe(self) -> asyncio.Queue:
+        self.ensure_started()
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, line: str) -> None:
+        self.buffer.append(line)
+        self._ready.set()
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()  # a slow viewer loses its oldest lines
+            queue.put_nowait(line)
+
+    async def _docker_command(self) -> List[str]:
+        # After a restart only new lines are wanted; the buffer has the rest
+        tail = f"--tail={0 if self.buffer else self.buffer.maxlen}"
+        # Probe once per reader start rather than per request
+        probe = await asyncio.create_subprocess_exec(
+            "docker", "service", "inspect", self.service,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        if await probe.wait() == 0:
+            return ["docker", "service", "logs", "--follow", tail, self.service]
+        return ["docker", "logs", "--follow", tail, self.service]
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                command = self._command or await self._docker_command()
+                self._process = await asyncio.create_subprocess_exec(
+                    *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+                )
+                async for raw in self._process.stdout:
+                    self._publish(raw.decode(errors="replace").rstrip("\n"))
+                code = await self._process.wait()
+                logger.info("Log reader for %s exited with %s", self.service, code)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Log reader for %s failed: %s", self.service, e)
+                message = f"Error fetching logs: {e}"
+                if not self.buffer or self.buffer[-1] != message:
+                    self._publish(message)
+            self._ready.set()  # nothing more is coming for now; don't keep tails waiting
+            await asyncio.sleep(self.RESTART_DELAY_SECONDS)
+
+
+class ServiceLogStreams:
+    """One follower per allowed service, created on first use."""
+
+    def __init__(self, services: Sequence[str] = DOCKER_SERVICES):
+        self.services = list(services)
+        self._followers: Dict[str, ServiceLogFollower] = {}
+
+    def follower(self, service: str) -> ServiceLogFollower:
+        if service not in self.services:
+            raise KeyError(service)
+        if service not in self._followers:
+            self._followers[service] = ServiceLogFollower(service)
+        return self._followers[service]
+
+    async def tail_all(self, lines: int) -> Dict[str, List[str]]:
+        tails = await asyncio.gather(*(self.follower(s).tail(lines) for s in self.services))
+        return dict(zip(self.services, tails))
+
+    async def stop(self) -> None:
+        for follower in self._followers.values():
+            await follower.stop()
+        self._followers.clear()
+
+
+# Global instance
+service_logs = ServiceLogStreams()
@@ -0,0 +1,129 @@
+# app/services/sql_profiler.py
+"""
+Opt-in per-request SQL profiling (SQL_PROFILING_ENABLED).
+
+Engine events time every statement and charge it to the profile of the
+request being served (a context variable set by `SQLProfilerMiddleware`).
+Statements are grouped by their SQL text, which is parameterized, so the
+same query run for many ids counts as one repeated shape; a shape repeated
+SQL_PROFILING_REPEAT_THRESHOLD times in one request is flagged as a likely
+N+1 pattern.
+
+The summary goes out as a `Server-Timing` header (visible in browser dev
+tools) and requests over the thresholds are logged. Statements that run
+after the response has started (streamed exports) are logged but cannot be
+in the header.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_current_profile: ContextVar["RequestProfile | None"] = ContextVar("sql_profile", default=None)
+
+
+@dataclass
+class RequestProfile:
+    statements: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run at least `threshold` times, most repeated first."""
+        return [(sql, count) for sql, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self, threshold: int) -> str:
+        desc = f"{self.statements} statements"
+        repeated = self.repeated(threshold)
+        if repeated:
+            desc += f", {len(repeated)} repeated (N+1?)"
+        return f'db;dur={self.db_seconds * 1000:.1f};desc="{desc}"'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None and context is not None:
+        context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profiler_started", None)
+    if profile is not None and started is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+
+def install(engine: AsyncEngine) -> None:
+    """Time statements on `engine`. Without this call profiling costs nothing."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class SQLProfilerMiddleware:
+    """Pure ASGI middleware giving each HTTP request its own RequestProfile."""
+
+    def __init__(
+        self,
+        app,
+        repeat_threshold: int = settings.SQL_PROFILING_REPEAT_THRESHOLD,
+        log_min_statements: int = settings.SQL_PROFILING_LOG_MIN_STATEMENTS,
+        log_min_db_ms: float = settings.SQL_PROFILING_LOG_MIN_DB_MS,
+    ):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+        self.log_min_statements = log_min_statements
+        self.log_min_db_ms = log_min_db_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing(self.repeat_threshold).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            self._report(scope, profile)
+
+    def _report(self, scope, profile: RequestProfile) -> None:
+        repeated = profile.repeated(self.repeat_threshold)
+        if not (
+            repeated
+            or profile.statements >= self.log_min_statements
+            or profile.db_seconds * 1000 >= self.log_min_db_ms
+        ):
+            return
+        route = getattr(scope.get("route"), "path", scope["path"])
+        logger.warning(
+            "%s %s ran %d SQL statements in %.1f ms%s",
+            scope["method"],
+            route,
+            profile.statements,
+            profile.db_seconds * 1000,
+            "".join(
+                f"\n  likely N+1: {count}x {' '.join(sql.split())[:200]}" for sql, count in repeated
+            ),
+        )
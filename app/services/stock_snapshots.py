@@ -0,0 +1,203 @@
+# app/services/stock_snapshots.py
+"""
+Periodic per-item stock snapshots and point-in-time stock queries.
+
+`StockSnapshotJob` records the quantity of every item that existed at each
+interval boundary (aligned to the epoch, so replicas agree on the boundary
+and daily snapshots land on midnight UTC). A snapshot is taken a settle
+delay after its boundary and computed as the current quantity minus
+everything created since the boundary, in one statement, so it is consistent
+even though transactions keep arriving. Snapshots older than the retention
+period are deleted as new ones are taken.
+
+Quantities also change without a ledger row (item edits, bulk import), so
+the ledger only explains history going forward from a snapshot. `stock_at`
+therefore answers from the latest snapshot at or before the requested time
+plus the transactions after it, so its cost is bounded by the snapshot
+interval rather than the item's whole history. Only when there is no earlier
+snapshot does it roll a later snapshot (or the live quantity) back through
+the ledger; that answer is flagged approximate.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import DateTime, case, delete, func, insert, literal, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.item import Item
+from app.models.stock_snapshot import StockSnapshot
+from app.models.transaction import Transaction, TransactionType
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+# Stock change of a ledger row: positive for IN, negative for OUT
+signed_quantity = case(
+    (Transaction.type == TransactionType.IN, Transaction.quantity), else_=-Transaction.quantity
+)
+
+
+def snapshot_boundary(now: datetime, interval: float, settle: float) -> datetime:
+    """The latest boundary whose settle delay has passed."""
+    elapsed = (now - EPOCH).total_seconds() - settle
+    return EPOCH + timedelta(seconds=elapsed - elapsed % interval)
+
+
+async def take_snapshot(db: AsyncSession, taken_at: datetime) -> int:
+    """Record every existing item's quantity as of `taken_at`; returns rows written (0 if already taken)."""
+    if await db.scalar(select(StockSnapshot.id).where(StockSnapshot.taken_at == taken_at).limit(1)):
+        return 0
+    later = (
+        select(Transaction.item_id, func.sum(signed_quantity).label("delta"))
+        .where(Transaction.created_at > taken_at)
+        .group_by(Transaction.item_id)
+        .subquery()
+    )
+    rows = select(
+        Item.id,
+        Item.quantity - func.coalesce(later.c.delta, 0),
+        literal(taken_at, DateTime),
+    ).outerjoin(later, later.c.item_id == Item.id).where(
+        # taken_at is naive UTC; created_at is compared as an aware timestamp
+        or_(Item.created_at.is_(None), Item.created_at <= taken_at.replace(tzinfo=timezone.utc))
+    )
+    try:
+        result = await db.execute(
+            insert(StockSnapshot).from_select(["item_id", "quantity", "taken_at"], rows)
+        )
+        await db.commit()
+    except IntegrityError:
+        # Another replica took this boundary first
+        await db.rollback()
+        return 0
+    return result.rowcount
+
+
+async def prune_snapshots(db: AsyncSession, before: datetime) -> int:
+    """Delete snapshots taken before `before`; returns rows deleted."""
+    result = await db.execute(delete(StockSnapshot).where(StockSnapshot.taken_at < before))
+    await db.commit()
+    return result.rowcount
+
+
+async def _delta(db: AsyncSession, item_id: int, after: datetime, until: datetime | None = None):
+    """(sum of signed quantities, row count) of an item's transactions in (after, until]."""
+    query = select(func.coalesce(func.sum(signed_quantity), 0), func.count()).where(
+        Transaction.item_id == item_id, Transaction.created_at > after
+    )
+    if until is not None:
+        query = query.where(Transaction.created_at <= until)
+    return (await db.execute(query)).one()
+
+
+async def stock_at(db: AsyncSession, item: Item, ts: datetime) -> dict:
+    """An item's quantity as of `ts` (naive UTC)."""
+    before = await db.scalar(
+        select(StockSnapshot)
+        .where(StockSnapshot.item_id == item.id, StockSnapshot.taken_at <= ts)
+        .order_by(StockSnapshot.taken_at.desc())
+        .limit(1)
+    )
+    after = None
+    if before is None:
+        after = await db.scalar(
+            select(StockSnapshot)
+            .where(StockSnapshot.item_id == item.id, StockSnapshot.taken_at > ts)
+            .order_by(StockSnapshot.taken_at)
+            .limit(1)
+        )
+
+    if before is not None:
+        # Roll the earlier snapshot forward
+        delta, applied = await _delta(db, item.id, before.taken_at, ts)
+        quantity, basis, basis_at = before.quantity + delta, "snapshot", before.taken_at
+    elif after is not None:
+        # Approximate: roll the later snapshot back
+        delta, applied = await _delta(db, item.id, ts, after.taken_at)
+        quantity, basis, basis_at = after.quantity - delta, "snapshot", after.taken_at
+    else:
+        # Approximate: roll the live quantity back; one statement, so both
+        # are read together
+        basis_at = datetime.utcnow()
+        later = (Transaction.item_id == item.id, Transaction.created_at > ts)
+        current, delta, applied = (await db.execute(
+            select(
+                Item.quantity,
+                select(func.coalesce(func.sum(signed_quantity), 0)).where(*later).scalar_subquery(),
+                select(func.count()).where(*later).scalar_subquery(),
+            ).where(Item.id == item.id)
+        )).one()
+        quantity, basis = current - delta, "current"
+
+    return {
+        "item_id": item.id,
+        "sku": item.sku,
+        "ts": ts,
+        "quantity": quantity,
+        "basis": basis,
+        "basis_at": basis_at,
+        "transactions_applied": applied,
+        "approximate": before is None,
+    }
+
+
+class StockSnapshotJob:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval: float = settings.STOCK_SNAPSHOT_INTERVAL_SECONDS,
+        settle: float = settings.STOCK_SNAPSHOT_SETTLE_SECONDS,
+        retention_days: float = settings.STOCK_SNAPSHOT_RETENTION_DAYS,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.settle = settle
+        self.retention_days = retention_days
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        boundary = snapshot_boundary(datetime.utcnow(), self.interval, self.settle)
+        async with self.session_factory() as db:
+            written = await take_snapshot(db, boundary)
+            pruned = 0
+            if self.retention_days:
+                pruned = await prune_snapshots(db, boundary - timedelta(days=self.retention_days))
+        if written:
+            logger.info("Stock snapshot at %s: %d items", boundary.isoformat(), written)
+        if pruned:
+            logger.info("Deleted %d stock snapshots older than %s days", pruned, self.retention_days)
+        return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Stock snapshot failed")
+            # Wake up when the next boundary has settled
+            now = datetime.utcnow()
+            next_run = snapshot_boundary(now, self.interval, self.settle) + timedelta(
+                seconds=self.interval + self.settle
+            )
+            await asyncio.sleep(max((next_run - now).total_seconds(), 1.0))
+
+
+# Global instance
+stock_snapshot_job = StockSnapshotJob()
@@ -1,6 +1,12 @@
-from sqlalchemy.orm import Session
+from typing import Callable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.item import Item
 from app.models.transaction import Transaction, TransactionType
+from app.services.catalog_version import bump_catalog_version
+from app.services.movement_rollups import record_movements
+from app.services.notifications import enqueue_low_stock_email
 from enum import Enum
 
 class TransactionType(str, Enum):
@@ -10,15 +16,28 @@ class InsufficientStockError(Exception):
     """Raised when stock is insufficient for an outbound transaction."""
     pass
 
-def apply_stock_change(
-    db: Session,
-    item: Item,
+class ItemNotFoundError(Exception):
+    """Raised when a stock change targets an item that does not exist."""
+    pass
+
+async def apply_stock_change(
+    db: AsyncSession,
+    item_id: int,
     type: str,
     quantity: int,
     user_id: int,
-) -> Transaction:
+    before_commit: Callable[[Transaction], None] | None = None,
+) -> tuple[Transaction, Item, int, bool]:
     """
     Apply a stock change (in or out) and create a transaction record.
+    Returns the transaction, the item, the quantity the change left and
+    whether that is low stock.
+
+    The stock check and the update are a single conditional UPDATE, so
+    concurrent outbound movements on the same item cannot oversell it, and
+    the ledger insert and the movement rollup are committed together with it.
+    `before_commit` is called with the new transaction just before the
+    commit, to add rows that must commit with it (e.g. an idempotency key).
     """
     # Validate type
     if type not in ("in", "out"):
@@ -30,30 +49,143 @@ def apply_stock_change(
     # Calculate delta
     delta = quantity if type_enum == TransactionType.IN else -quantity
 
-    # Check stock for outbound
-    if delta < 0 and item.quantity + delta < 0:
+    # Update stock, but only if it stays non-negative
+    item = (await db.scalars(
+        update(Item)
+        .where(Item.id == item_id, Item.quantity + delta >= 0)
+        .values(quantity=Item.quantity + delta)
+        .returning(Item),
+        # Overwrite any copy of the item already loaded in this session.
+        execution_options={"synchronize_session": False, "populate_existing": True},
+    )).one_or_none()
+
+    if item is None:
+        # Only the failure path pays for a second look at the row.
+        current = (
+            await db.execute(select(Item.sku, Item.quantity).where(Item.id == item_id))
+        ).first()
+        await db.rollback()
+        if current is None:
+            raise ItemNotFoundError(f"Item {item_id} not found")
         raise InsufficientStockError(
-            f"Insufficient stock for item {item.sku}. "
-            f"Available: {item.quantity}, Requested: {quantity}"
+            f"Insufficient stock for item {current.sku}. "
+            f"Available: {current.quantity}, Requested: {quantity}"
         )
 
-    # Update stock
-    item.quantity += delta
-    db.commit()
-    db.refresh(item)
-
     # Create transaction record
-    tx = Transaction(
-        user_id=user_id,
-        item_id=item.id,
-        quantity=quantity,
-        type=type_enum.value,  # Send string matching DB constraint
-    )
-    db.add(tx)
-    db.commit()
-    db.refresh(tx)
-
-    # Check low stock
+    tx = (await db.scalars(
+        insert(Transaction).returning(Transaction),
+        [{
+            "user_id": user_id,
+            "item_id": item.id,
+            "quantity": quantity,
+            "type": type_enum,
+        }],
+    )).one()
+    await record_movements(db, [tx])
+
+    # Check low stock; the email is queued in the same commit as the change
     is_low_stock = item.quantity <= item.low_stock_threshold
+    if is_low_stock:
+        enqueue_low_stock_email(db, item)
+    if before_commit is not None:
+        before_commit(tx)
+    await bump_catalog_version(db, [item.id])
+    await db.commit()
+
+    return tx, item, item.quantity, is_low_stock
+
+
+class BatchRejectedError(Exception):
+    """Raised when an all-or-nothing batch contains a movement that cannot be applied."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(f"{len(errors)} transaction(s) in the batch could not be applied")
+        self.errors = errors
+
+
+async def apply_stock_changes(
+    db: AsyncSession,
+    changes: list,
+    user_id: int,
+    atomic: bool = True,
+    before_commit: Callable[[list[Transaction], list[dict]], None] | None = None,
+) -> tuple[list[Transaction], list[dict], list[Item]]:
+    """
+    Apply many stock changes in a single database transaction.
+
+    The affected items are locked in id order, so concurrent batches touching
+    overlapping items cannot deadlock. Changes are applied in the order given;
+    each needs `item_id`, `type` and `quantity` attributes. With `atomic` any
+    rejected change aborts the whole batch with `BatchRejectedError`,
+    otherwise rejected changes are skipped and reported.
+
+    Returns the created transactions, the per-change errors (with their index
+    in `changes`) and the items whose stock changed. `before_commit` is
+    called with the first two just before the commit.
+    """
+    item_ids = sorted({change.item_id for change in changes})
+    items = {
+        item.id: item
+        for item in await db.scalars(
+            select(Item)
+            .where(Item.id.in_(item_ids))
+            .order_by(Item.id)
+            .with_for_update()
+        )
+    }
+
+    errors = []
+    rows = []
+    for index, change in enumerate(changes):
+        item = items.get(change.item_id)
+        if item is None:
+            errors.append({"index": index, "item_id": change.item_id, "detail": "Item not found"})
+            continue
+        if change.type not in ("in", "out"):
+            errors.append({
+                "index": index,
+                "item_id": change.item_id,
+                "detail": f"Invalid transaction type: {change.type}. Must be 'in' or 'out'.",
+            })
+            continue
+        delta = change.quantity if change.type == "in" else -change.quantity
+        if item.quantity + delta < 0:
+            errors.append({
+                "index": index,
+                "item_id": change.item_id,
+                "detail": (
+                    f"Insufficient stock for item {item.sku}. "
+                    f"Available: {item.quantity}, Requested: {change.quantity}"
+                ),
+            })
+            continue
+        # Locked rows: the running total is authoritative until we commit.
+        item.quantity += delta
+        rows.append({
+            "user_id": user_id,
+            "item_id": item.id,
+            "quantity": change.quantity,
+            "type": TransactionType(change.type),
+        })
+
+    if errors and atomic:
+        await db.rollback()
+        raise BatchRejectedError(errors)
+
+    transactions = []
+    if rows:
+        transactions = list(await db.scalars(insert(Transaction).returning(Transaction), rows))
+        await record_movements(db, transactions)
+
+    touched_ids = {row["item_id"] for row in rows}
+    touched = [items[item_id] for item_id in item_ids if item_id in touched_ids]
+    for item in touched:
+        if item.quantity <= item.low_stock_threshold:
+            enqueue_low_stock_email(db, item)
+    if before_commit is not None:
+        before_commit(transactions, errors)
+    await bump_catalog_version(db, touched_ids)
+    await db.commit()
 
-    return tx, is_low_stock
+    return transactions, errors, touched
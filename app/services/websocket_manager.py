@@ -1,40 +1,258 @@
 # app/services/websocket_manager.py
 """
 WebSocket connection manager for broadcasting real-time updates to connected clients.
+
+Every connection gets a bounded send queue drained by its own writer task, so
+`broadcast` only serializes the message once and enqueues it; a slow client
+never delays the others or the request that triggered the broadcast. When a
+client's queue is full the configured slow-consumer policy decides whether to
+drop its oldest queued message, drop the new one, or disconnect it.
+
+Clients may narrow what they receive by subscribing to event types, item ids
+or SKU prefixes. A client with no subscriptions receives every event; one
+with subscriptions receives an event when any of them matches it. Routing
+goes through an index from topic to clients, so an event only visits the
+clients interested in it.
+
+With an event bus (see `app.services.event_bus`) broadcasts are published to
+the bus and delivered to local sockets when the bus hands them back, so every
+worker process sharing the bus reaches its own clients. Publishing happens in
+the background: broadcasts follow database commits, and a bus that is down
+or reconnecting must not turn a committed change into an error response.
 """
-from typing import Set
-from fastapi import WebSocket
+import asyncio
 import json
+import logging
+from typing import Dict, Iterable, Set
+
+from fastapi import WebSocket, status
+
+from app.core.config import settings
+from app.services.event_bus import EventBus, event_bus
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+BUS_TOPIC = "ws"
+
+
+class _Client:
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        self.dropped = 0
+        self.event_types: Set[str] = set()
+        self.item_ids: Set[int] = set()
+        self.sku_prefixes: Set[str] = set()
+
+    @property
+    def is_filtered(self) -> bool:
+        return bool(self.event_types or self.item_ids or self.sku_prefixes)
+
+    def subscriptions(self) -> dict:
+        return {
+            "event_types": sorted(self.event_types),
+            "item_ids": sorted(self.item_ids),
+            "sku_prefixes": sorted(self.sku_prefixes),
+        }
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Set[WebSocket] = set()
+    def __init__(
+        self,
+        queue_size: int = settings.WS_SEND_QUEUE_SIZE,
+        slow_consumer_policy: str = settings.WS_SLOW_CONSUMER_POLICY,
+        bus: EventBus | None = None,
+    ):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
+        self.queue_size = queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self.active_connections: Dict[WebSocket, _Client] = {}
+        # Routing index: clients without subscriptions, and topic -> clients
+        self._unfiltered: Set[_Client] = set()
+        self._by_event_type: Dict[str, Set[_Client]] = {}
+        self._by_item_id: Dict[int, Set[_Client]] = {}
+        self._by_sku_prefix: Dict[str, Set[_Client]] = {}
+        self.bus = bus
+        self._pending: Set[asyncio.Task] = set()
+        if bus is not None:
+            bus.subscribe(BUS_TOPIC, self._on_bus_message)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.add(websocket)
-        print(f"✓ WebSocket connected. Total connections: {len(self.active_connections)}")
+        client = _Client(websocket, self.queue_size)
+        client.writer = asyncio.create_task(self._write(client))
+        self.active_connections[websocket] = client
+        self._unfiltered.add(client)
+        logger.info("WebSocket connected. Total connections: %d", len(self.active_connections))
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
-        print(f"✓ WebSocket disconnected. Total connections: {len(self.active_connections)}")
-
-    async def broadcast(self, message: dict):
-        """Send message to all connected clients"""
-        print(f"📢 Broadcasting to {len(self.active_connections)} clients: {json.dumps(message)}")
-        disconnected = set()
-        for connection in self.active_connections:
+        client = self.active_connections.pop(websocket, None)
+        if client is None:
+            return
+        self._unfiltered.discard(client)
+        self._unindex(client, client.event_types, client.item_ids, client.sku_prefixes)
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        logger.info("WebSocket disconnected. Total connections: %d", len(self.active_connections))
+
+    def queue_depth(self) -> int:
+        """Messages waiting in all send queues."""
+        return sum(client.queue.qsize() for client in self.active_connections.values())
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        event_types: Iterable[str] = (),
+        item_ids: Iterable[int] = (),
+        sku_prefixes: Iterable[str] = (),
+    ) -> dict:
+        """Add subscriptions for a connection and return all of its subscriptions."""
+        client = self.active_connections[websocket]
+        event_types, item_ids = set(event_types), set(item_ids)
+        sku_prefixes = {prefix for prefix in sku_prefixes if prefix}
+        client.event_types |= event_types
+        client.item_ids |= item_ids
+        client.sku_prefixes |= sku_prefixes
+        for key, index in (
+            (event_types, self._by_event_type),
+            (item_ids, self._by_item_id),
+            (sku_prefixes, self._by_sku_prefix),
+        ):
+            for topic in key:
+                index.setdefault(topic, set()).add(client)
+        if client.is_filtered:
+            self._unfiltered.discard(client)
+        return client.subscriptions()
+
+    def unsubscribe(
+        self,
+        websocket: WebSocket,
+        event_types: Iterable[str] = (),
+        item_ids: Iterable[int] = (),
+        sku_prefixes: Iterable[str] = (),
+    ) -> dict:
+        """Remove subscriptions; a connection left with none receives everything again."""
+        client = self.active_connections[websocket]
+        event_types = client.event_types & set(event_types)
+        item_ids = client.item_ids & set(item_ids)
+        sku_prefixes = client.sku_prefixes & set(sku_prefixes)
+        self._unindex(client, event_types, item_ids, sku_prefixes)
+        client.event_types -= event_types
+        client.item_ids -= item_ids
+        client.sku_prefixes -= sku_prefixes
+        if not client.is_filtered:
+            self._unfiltered.add(client)
+        return client.subscriptions()
+
+    def _unindex(self, client: _Client, event_types, item_ids, sku_prefixes):
+        for key, index in (
+            (event_types, self._by_event_type),
+            (item_ids, self._by_item_id),
+            (sku_prefixes, self._by_sku_prefix),
+        ):
+            for topic in key:
+                clients = index.get(topic)
+                if clients is None:
+                    continue
+                clients.discard(client)
+                if not clients:
+                    del index[topic]
+
+    def _recipients(self, event_type: str | None, item_ids: Iterable[int], skus: Iterable[str]) -> Set[_Client]:
+        recipients = set(self._unfiltered)
+        if event_type in self._by_event_type:
+            recipients |= self._by_event_type[event_type]
+        for item_id in item_ids:
+            recipients |= self._by_item_id.get(item_id, set())
+        if self._by_sku_prefix:
+            prefix_lengths = {len(prefix) for prefix in self._by_sku_prefix}
+            for sku in skus:
+                for length in prefix_lengths:
+                    if length <= len(sku):
+                        recipients |= self._by_sku_prefix.get(sku[:length], set())
+        return recipients
+
+    async def broadcast(
+        self,
+        message: dict,
+        item_ids: Iterable[int] = (),
+        skus: Iterable[str] = (),
+    ):
+        """
+        Queue a message for every interested client without waiting for delivery.
+
+        `item_ids` and `skus` name the items the event is about, for routing
+        to clients subscribed by item id or SKU prefix. With a bus the message
+        is published instead, and every process delivers it to its own clients.
+        """
+        if self.bus is None:
+            self._deliver(message.get("type"), item_ids, skus, json.dumps(message))
+            return
+        # Routing header on the first line, the client-facing message after it
+        header = json.dumps({"type": message.get("type"), "item_ids": list(item_ids), "skus": list(skus)})
+        task = asyncio.create_task(self._publish(f"{header}\n{json.dumps(message)}"))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _publish(self, payload: str):
+        try:
+            await self.bus.publish(BUS_TOPIC, payload)
+        except Exception:
+            logger.exception("Publishing a WebSocket event to the event bus failed")
+
+    def _on_bus_message(self, payload: str):
+        header, _, text = payload.partition("\n")
+        route = json.loads(header)
+        self._deliver(route["type"], route["item_ids"], route["skus"], text)
+
+    def _deliver(self, event_type: str | None, item_ids: Iterable[int], skus: Iterable[str], text: str):
+        for client in self._recipients(event_type, item_ids, skus):
+            self._enqueue(client, text)
+
+    def send_personal(self, websocket: WebSocket, message: dict):
+        """Queue a message for a single connection."""
+        client = self.active_connections.get(websocket)
+        if client is not None:
+            self._enqueue(client, json.dumps(message))
+
+    def _enqueue(self, client: _Client, text: str):
+        try:
+            client.queue.put_nowait(text)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        client.dropped += 1
+        if self.slow_consumer_policy == "drop_newest":
+            return
+        if self.slow_consumer_policy == "drop_oldest":
+            client.queue.get_nowait()
+            client.queue.put_nowait(text)
+            return
+
+        logger.warning("Disconnecting slow WebSocket consumer (%d messages queued)", client.queue.qsize())
+        self.disconnect(client.websocket)
+        asyncio.create_task(self._close(client.websocket))
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+
+    async def _write(self, client: _Client):
+        while True:
+            text = await client.queue.get()
             try:
-                await connection.send_json(message)
-                print(f"  ✓ Message sent to client")
+                await client.websocket.send_text(text)
             except Exception as e:
-                print(f"  ✗ Error sending to client: {e}")
-                # Connection lost, mark for removal
-                disconnected.add(connection)
-        
-        # Clean up disconnected clients
-        for connection in disconnected:
-            self.active_connections.discard(connection)
+                # Connection lost
+                logger.info("Error sending to WebSocket client: %s", e)
+                self.disconnect(client.websocket)
+                return
 
 # Global instance
-manager = ConnectionManager()
+manager = ConnectionManager(bus=event_bus)
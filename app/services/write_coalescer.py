@@ -0,0 +1,161 @@
+# app/services/write_coalescer.py
+"""
+Group commit for stock movements on hot items (STOCK_COALESCING_ENABLED).
+
+Without it every movement takes the item's row lock and commits on its own,
+so concurrent movements on one item queue up behind each other's commits.
+`StockWriteCoalescer.submit` instead parks each movement with a future; the
+first one for an item starts a short window, and when it closes (or the
+batch is full) the whole batch is applied in one database transaction:
+
+* the item row is locked once, and the movements are walked in arrival
+  order against a running quantity, rejecting any that would oversell it;
+* the accepted ones become one net UPDATE of the item, one multi-row ledger
+  insert and one rollup upsert, committed together;
+* each caller's future gets its own transaction, the quantity its own
+  movement left and whether that is low stock, or its own
+  InsufficientStockError, as `apply_stock_change` would. The item object is
+  shared by the batch and holds the quantity after all of it.
+
+Coalescing only happens within a process; other processes still take the
+row lock, so correctness does not depend on it. Requests that must commit
+extra rows with their change (idempotency keys) bypass it.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Set
+
+from sqlalchemy import insert, select
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.models.item import Item
+from app.models.transaction import Transaction, TransactionType
+from app.services.catalog_version import bump_catalog_version
+from app.services.movement_rollups import record_movements
+from app.services.notifications import enqueue_low_stock_email
+from app.services.transaction_service import InsufficientStockError, ItemNotFoundError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Movement:
+    type: str
+    quantity: int
+    user_id: int
+    future: asyncio.Future
+
+
+class StockWriteCoalescer:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        window: float = settings.STOCK_COALESCE_WINDOW_SECONDS,
+        max_batch: int = settings.STOCK_COALESCE_MAX_BATCH,
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[int, List[_Movement]] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def submit(
+        self, item_id: int, type: str, quantity: int, user_id: int
+    ) -> tuple[Transaction, Item, int, bool]:
+        """Same contract as `apply_stock_change`, applied in the item's next batch."""
+        if type not in ("in", "out"):
+            raise ValueError(f"Invalid transaction type: {type}. Must be 'in' or 'out'.")
+        loop = asyncio.get_running_loop()
+        movement = _Movement(type, quantity, user_id, loop.create_future())
+        batch = self._pending.setdefault(item_id, [])
+        batch.append(movement)
+        if len(batch) >= self.max_batch:
+            self._start_flush(item_id)
+        elif len(batch) == 1:
+            self._timers[item_id] = loop.call_later(self.window, self._start_flush, item_id)
+        return await movement.future
+
+    async def stop(self) -> None:
+        """Apply whatever is waiting and wait for batches in flight."""
+        for item_id in list(self._pending):
+            self._start_flush(item_id)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _start_flush(self, item_id: int) -> None:
+        timer = self._timers.pop(item_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(item_id, None)
+        if batch:
+            task = asyncio.create_task(self._flush(item_id, batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, item_id: int, batch: List[_Movement]) -> None:
+        try:
+            async with self.session_factory() as db:
+                results = await self._apply(db, item_id, batch)
+        except Exception as exc:
+            logger.exception("Coalesced stock change for item %s failed", item_id)
+            results = [exc] * len(batch)
+        for movement, result in zip(batch, results):
+            if movement.future.done():
+                continue  # the caller went away
+            if isinstance(result, Exception):
+                movement.future.set_exception(result)
+            else:
+                movement.future.set_result(result)
+
+    async def _apply(self, db, item_id: int, batch: List[_Movement]) -> list:
+        item = await db.scalar(select(Item).where(Item.id == item_id).with_for_update())
+        if item is None:
+            return [ItemNotFoundError(f"Item {item_id} not found") for _ in batch]
+
+        # Walk the batch in arrival order; the locked row is authoritative
+        available = item.quantity
+        outcomes, rows = [], []
+        for movement in batch:
+            delta = movement.quantity if movement.type == "in" else -movement.quantity
+            if available + delta < 0:
+                outcomes.append(InsufficientStockError(
+                    f"Insufficient stock for item {item.sku}. "
+                    f"Available: {available}, Requested: {movement.quantity}"
+                ))
+                continue
+            available += delta
+            outcomes.append(available)
+            rows.append({
+                "user_id": movement.user_id,
+                "item_id": item_id,
+                "quantity": movement.quantity,
+                "type": TransactionType(movement.type),
+            })
+        if not rows:
+            await db.rollback()
+            return outcomes
+
+        item.quantity = available  # one UPDATE for the net change
+        transactions = iter(await db.scalars(
+            insert(Transaction).returning(Transaction, sort_by_parameter_order=True), rows
+        ))
+        accepted = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+        results = [
+            outcome if isinstance(outcome, Exception)
+            # Low stock as left by this caller's own movement
+            else (next(transactions), item, outcome, outcome <= item.low_stock_threshold)
+            for outcome in outcomes
+        ]
+        await record_movements(db, [result[0] for result in results if isinstance(result, tuple)])
+        if any(quantity <= item.low_stock_threshold for quantity in accepted):
+            enqueue_low_stock_email(db, item)
+        await bump_catalog_version(db, [item_id])
+        await db.commit()
+        return results
+
+
+# Global instance
+write_coalescer = StockWriteCoalescer()
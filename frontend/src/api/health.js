@@ -31,4 +31,22 @@ export const healthAPI = {
       params: { lines }
     });
   },
+
+  /**
+   * Follow logs from a Docker service live over a WebSocket
+   * @param {string} serviceName - Name of the service (e.g., 'ims_stack_api')
+   * @param {number} lines - Number of recent lines sent first (default: 100)
+   * @param {Function} onMessage - Called with {type: 'log_tail', lines} once, then {type: 'log_line', line}
+   * @returns {WebSocket} Close it to stop following
+   */
+  streamServiceLogs: (serviceName, lines = 100, onMessage) => {
+    const apiUrl = new URL(client.defaults.baseURL);
+    const protocol = apiUrl.protocol === 'https:' ? 'wss' : 'ws';
+    const token = encodeURIComponent(localStorage.getItem('token') || '');
+    const ws = new WebSocket(
+      `${protocol}://${apiUrl.host}/health/service-logs/${serviceName}/ws?token=${token}&lines=${lines}`
+    );
+    ws.onmessage = (event) => onMessage(JSON.parse(event.data));
+    return ws;
+  },
 };
@@ -1,12 +1,38 @@
 import client from './client';
 
+// Largest page the API serves (MAX_PAGE_SIZE)
+const PAGE_SIZE = 500;
+
 export const itemsAPI = {
   create: (itemData) => {
     return client.post('/items/', itemData);
   },
 
-  list: () => {
-    return client.get('/items/');
+  importFile: (file) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return client.post('/items/import', formData);
+  },
+
+  // Every item: follows X-Next-Cursor until the last page. Resolves to a
+  // response-shaped object so callers can keep reading `.data`.
+  list: async () => {
+    const items = [];
+    let cursor = null;
+    do {
+      const params = { limit: PAGE_SIZE };
+      if (cursor) {
+        params.cursor = cursor;
+      }
+      const response = await client.get('/items/', { params });
+      items.push(...response.data);
+      cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return { data: items };
+  },
+
+  lowStock: (params = {}) => {
+    return client.get('/items/low-stock', { params });
   },
 
   get: (itemId) => {
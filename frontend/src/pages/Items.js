@@ -32,6 +32,9 @@ function Items() {
         } else if (message.type === 'low_stock_alert') {
             //alert(message.data.message);
             setNotifications(prev => [...prev, message.data]);
+        } else if (message.type === 'transactions_batch_created') {
+            fetchItems();
+            setNotifications(prev => [...prev, ...message.data.low_stock]);
         }
     });
 
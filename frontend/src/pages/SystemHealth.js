@@ -1,7 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { healthAPI } from '../api/health';
 import '../styles/SystemHealth.css';
 
+// Log lines kept on screen while following a service
+const MAX_LOG_LINES = 500;
+
 function SystemHealth() {
     const [metrics, setMetrics] = useState(null);
     const [loading, setLoading] = useState(true);
@@ -10,6 +13,7 @@ function SystemHealth() {
     const [serviceLogs, setServiceLogs] = useState(null);
     const [refreshInterval, setRefreshInterval] = useState(60); // seconds
     const [lastUpdated, setLastUpdated] = useState(null);
+    const logSocket = useRef(null);
 
     // Fetch system metrics
     const fetchMetrics = async () => {
@@ -28,18 +32,33 @@ function SystemHealth() {
         }
     };
 
-    // Fetch logs for selected service
-    const fetchServiceLogs = async (serviceName) => {
-        try {
-            const response = await healthAPI.getServiceLogs(serviceName, 100);
-            setServiceLogs(response.data);
-            setSelectedService(serviceName);
-        } catch (err) {
-            setError(err.response?.data?.detail || 'Failed to fetch service logs');
-            console.error('Error fetching logs:', err);
-        }
+    // Follow logs for selected service live
+    const fetchServiceLogs = (serviceName) => {
+        if (logSocket.current) logSocket.current.close();
+        setSelectedService(serviceName);
+        setServiceLogs(null);
+        const ws = healthAPI.streamServiceLogs(serviceName, MAX_LOG_LINES, (message) => {
+            if (message.type === 'log_tail') {
+                setServiceLogs({
+                    service: serviceName,
+                    timestamp: new Date().toISOString(),
+                    logs: message.lines,
+                    log_lines: message.lines.length,
+                });
+            } else if (message.type === 'log_line') {
+                setServiceLogs((prev) => {
+                    const logs = [...(prev?.logs || []), message.line].slice(-MAX_LOG_LINES);
+                    return { ...prev, timestamp: new Date().toISOString(), logs, log_lines: logs.length };
+                });
+            }
+        });
+        ws.onerror = () => setError('Failed to stream service logs');
+        logSocket.current = ws;
     };
 
+    // Stop following logs when leaving the page
+    useEffect(() => () => logSocket.current && logSocket.current.close(), []);
+
     // Initial fetch
     useEffect(() => {
         fetchMetrics();
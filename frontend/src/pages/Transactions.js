@@ -19,7 +19,7 @@ function Transactions() {
 
   // WebSocket for real-time transaction updates
   useWebSocket((message) => {
-    if (message.type === 'transaction_created') {
+    if (message.type === 'transaction_created' || message.type === 'transactions_batch_created') {
       fetchData();
     }
   });
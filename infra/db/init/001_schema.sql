@@ -7,8 +7,11 @@ CREATE TABLE IF NOT EXISTS users (
   full_name VARCHAR(100),
   is_active BOOLEAN DEFAULT TRUE,
   role VARCHAR(20) NOT NULL DEFAULT 'staff' CHECK (role IN ('manager','staff')),
+  token_version INTEGER NOT NULL DEFAULT 0,
   created_at TIMESTAMPTZ DEFAULT NOW()
 );
+-- added after the first release
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
 
 -- items
 CREATE TABLE IF NOT EXISTS items (
@@ -19,8 +22,15 @@ CREATE TABLE IF NOT EXISTS items (
   quantity INTEGER NOT NULL DEFAULT 0,
   low_stock_threshold INTEGER NOT NULL DEFAULT 5,
   price FLOAT NOT NULL DEFAULT 0.0,
-  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+  version INTEGER NOT NULL DEFAULT 1,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  created_at TIMESTAMPTZ DEFAULT NOW()
 );
+-- added after the first release
+ALTER TABLE items ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+-- existing items keep NULL (creation time unknown); new ones get NOW()
+ALTER TABLE items ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ;
+ALTER TABLE items ALTER COLUMN created_at SET DEFAULT NOW();
 
 -- transactions
 CREATE TABLE IF NOT EXISTS transactions (
@@ -35,8 +45,18 @@ CREATE TABLE IF NOT EXISTS transactions (
 -- helpful indexes
 CREATE INDEX IF NOT EXISTS idx_items_name ON items (name);
 CREATE INDEX IF NOT EXISTS idx_items_sku ON items (sku);
+-- keyset pagination of the catalog by each sortable column
+CREATE INDEX IF NOT EXISTS ix_items_name_id ON items (name, id);
+CREATE INDEX IF NOT EXISTS ix_items_quantity_id ON items (quantity, id);
+CREATE INDEX IF NOT EXISTS ix_items_price_id ON items (price, id);
+-- reorder view: partial index over low-stock items only
+CREATE INDEX IF NOT EXISTS ix_items_low_stock ON items (quantity, id) WHERE quantity <= low_stock_threshold;
 CREATE INDEX IF NOT EXISTS idx_transactions_item_id ON transactions (item_id);
 CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions (user_id);
+-- keyset pagination of the ledger, newest first, optionally per item / per user
+CREATE INDEX IF NOT EXISTS ix_transactions_created_at_id ON transactions (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_transactions_item_id_created_at_id ON transactions (item_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_transactions_user_id_created_at_id ON transactions (user_id, created_at, id);
 
 -- update updated_at automatically
 CREATE OR REPLACE FUNCTION set_updated_at()
@@ -57,4 +77,59 @@ BEGIN
     FOR EACH ROW
     EXECUTE FUNCTION set_updated_at();
   END IF;
-END $$;
\ No newline at end of file
+END $$;
+-- notifications written together with the stock change, drained by the API's outbox worker
+CREATE TABLE IF NOT EXISTS notification_outbox (
+  id SERIAL PRIMARY KEY,
+  kind VARCHAR(50) NOT NULL,
+  payload JSON NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  last_error TEXT,
+  next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_notification_outbox_status_next_attempt_at ON notification_outbox (status, next_attempt_at);
+
+-- per-item quantity at interval boundaries, for point-in-time stock queries
+CREATE TABLE IF NOT EXISTS stock_snapshots (
+  id SERIAL PRIMARY KEY,
+  item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+  quantity INTEGER NOT NULL,
+  taken_at TIMESTAMP NOT NULL,
+  CONSTRAINT uq_stock_snapshots_item_id_taken_at UNIQUE (item_id, taken_at)
+);
+CREATE INDEX IF NOT EXISTS ix_stock_snapshots_taken_at ON stock_snapshots (taken_at);
+
+-- per-item daily IN/OUT totals for analytics, maintained with every stock change
+CREATE TABLE IF NOT EXISTS movement_rollups (
+  item_id INTEGER NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  quantity_in INTEGER NOT NULL DEFAULT 0,
+  quantity_out INTEGER NOT NULL DEFAULT 0,
+  transactions_in INTEGER NOT NULL DEFAULT 0,
+  transactions_out INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (item_id, day)
+);
+CREATE INDEX IF NOT EXISTS ix_movement_rollups_day_item_id ON movement_rollups (day, item_id);
+
+-- catalog version for list ETags, sharded by item id (rows are created on first write)
+CREATE TABLE IF NOT EXISTS catalog_state (
+  shard INTEGER PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+);
+
+-- responses to POSTs sent with an Idempotency-Key, kept for IDEMPOTENCY_KEY_TTL_SECONDS
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  id SERIAL PRIMARY KEY,
+  user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  key VARCHAR(255) NOT NULL,
+  fingerprint VARCHAR(64) NOT NULL,
+  status_code INTEGER NOT NULL,
+  response_body TEXT NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+  CONSTRAINT uq_idempotency_keys_user_id_key UNIQUE (user_id, key)
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_created_at ON idempotency_keys (created_at);
@@ -0,0 +1,117 @@
+"""
+Time list serialization: ORM objects through the response models (what
+FastAPI does with `response_model`) against column rows encoded by orjson
+(app.services.fast_json), plus the NDJSON ledger export.
+
+    DATABASE_URL=sqlite:///./bench.db python tests/benchmarks/list_serialization.py 10000 100000
+
+Each size is seeded into a fresh SQLite file; times are the best of
+`--repeat` runs and include the query.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.db.database import Base  # noqa: E402
+from app.models.item import Item  # noqa: E402
+from app.models.transaction import Transaction  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.item import ItemRead  # noqa: E402
+from app.schemas.transaction import TransactionOut  # noqa: E402
+from app.services.fast_json import ORJSONRowsResponse, model_columns, rows_to_dicts  # noqa: E402
+from app.services.ledger_export import (  # noqa: E402
+    EXPORT_COLUMNS,
+    _row_values,
+    ledger_export_statement,
+    stream_ndjson,
+)
+
+
+async def seed(session_factory, n: int) -> None:
+    async with session_factory() as db:
+        await db.execute(insert(User), [{"username": "bench", "email": "bench@ims.local", "hashed_password": "x"}])
+        await db.execute(insert(Item), [
+            {"name": f"Item {i}", "sku": f"SKU-{i:06d}", "description": "Bench item",
+             "quantity": i % 50, "low_stock_threshold": 5, "price": i / 100}
+            for i in range(n)
+        ])
+        start = datetime(2024, 1, 1)
+        await db.execute(insert(Transaction), [
+            {"user_id": 1, "item_id": i % n + 1, "quantity": 1 + i % 7,
+             "type": "IN" if i % 3 else "OUT", "created_at": start + timedelta(seconds=i)}
+            for i in range(n)
+        ])
+        await db.commit()
+
+
+async def best_of(repeat: int, fn) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+async def run(n: int, repeat: int) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await seed(session_factory, n)
+
+    cases = {}
+    for model, schema in ((Item, ItemRead), (Transaction, TransactionOut)):
+        adapter = TypeAdapter(list[schema])
+
+        async def models(model=model, adapter=adapter):
+            async with session_factory() as db:
+                objects = (await db.scalars(select(model).order_by(model.id))).all()
+                return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+        async def rows(model=model, schema=schema):
+            async with session_factory() as db:
+                result = (await db.execute(select(*model_columns(model, schema)).order_by(model.id))).all()
+                return ORJSONRowsResponse(rows_to_dicts(result)).body
+
+        assert json.loads(await models()) == json.loads(await rows())
+        cases[f"{model.__tablename__} list"] = (models, rows)
+
+    async def ndjson_stdlib():
+        async with session_factory() as db:
+            result = await db.execute(ledger_export_statement([]))
+            return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(row)))) + "\n" for row in result)
+
+    async def ndjson_orjson():
+        async with session_factory() as db:
+            return b"".join([chunk async for chunk in stream_ndjson(db, ledger_export_statement([]))])
+
+    cases["ndjson export"] = (ndjson_stdlib, ndjson_orjson)
+
+    for name, (before, after) in cases.items():
+        t_before = await best_of(repeat, before)
+        t_after = await best_of(repeat, after)
+        print(f"{n:>7} rows  {name:<18} before {t_before * 1000:8.1f} ms   after {t_after * 1000:8.1f} ms"
+              f"   x{t_before / t_after:.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for size in args.sizes:
+        asyncio.run(run(size, args.repeat))
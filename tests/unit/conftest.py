@@ -0,0 +1,65 @@
+# tests/unit/conftest.py
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.db.database import Base
+from app.core.security import create_access_token
+from app.db import database as db_module
+from app.services.principals import principal_cache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Principals are cached by user id, which every test database reuses."""
+    principal_cache.clear()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def session_factory(db_path):
+    """Synchronous sessions on the test database, for seeding and assertions."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def async_session_factory(db_path, session_factory):
+    """The async sessions the application itself uses, on the same database."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    yield async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def client(async_session_factory):
+    async def override_get_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[db_module.get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(db_module.get_db, None)
+
+
+@pytest.fixture
+def auth_headers():
+    """Build a bearer token header for a user id without going through bcrypt."""
+    def make(user_id: int, role: str = "staff", version: int = 0) -> dict:
+        token = create_access_token({"sub": str(user_id), "role": role, "ver": version})
+        return {"Authorization": f"Bearer {token}"}
+    return make
@@ -0,0 +1,103 @@
+# tests/unit/test_conditional_get.py
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.item import Item
+from app.models.user import User, UserRole
+from app.services.catalog_version import bump_catalog_version, catalog_version
+
+
+@pytest.fixture
+def seeded(session_factory, auth_headers):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role=UserRole.staff)
+    item = Item(name="Bolt", sku="B-1", quantity=10, low_stock_threshold=2, price=0.5)
+    db.add_all([user, Item(name="Nut", sku="N-1", quantity=1), item])
+    db.commit()
+    ids = user.id, item.id
+    db.close()
+    return auth_headers(ids[0]), ids[1]
+
+
+def _revalidate(client, url, headers, etag, **params):
+    return client.get(url, params=params, headers={**headers, "If-None-Match": etag})
+
+
+def test_item_etag_follows_item_version(client, seeded):
+    headers, item_id = seeded
+    resp = client.get(f"/items/{item_id}", headers=headers)
+    etag = resp.headers["ETag"]
+    assert resp.json()["version"] == 1
+
+    resp = _revalidate(client, f"/items/{item_id}", headers, etag)
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["ETag"] == etag
+
+    # A stock movement is a Core UPDATE; it still bumps the version
+    client.post(
+        "/transactions/", json={"item_id": item_id, "type": "out", "quantity": 3}, headers=headers
+    )
+    resp = _revalidate(client, f"/items/{item_id}", headers, etag)
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 2
+    assert resp.headers["ETag"] != etag
+
+
+def test_catalog_etag_changes_with_every_write(client, seeded):
+    headers, item_id = seeded
+    resp = client.get("/items/", params={"limit": 1}, headers=headers)
+    etag = resp.headers["ETag"]
+    assert _revalidate(client, "/items/", headers, etag, limit=1).status_code == 304
+    # Different query, different representation
+    assert _revalidate(client, "/items/", headers, etag, limit=2).status_code == 200
+
+    resp = client.post("/items/", json={"name": "Tape", "sku": "T-1"}, headers=headers)
+    new_id = resp.json()["id"]
+    resp = _revalidate(client, "/items/", headers, etag, limit=1)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    client.delete(f"/items/{new_id}", headers=headers)
+    resp = _revalidate(client, "/items/", headers, etag, limit=1)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    client.put(f"/items/{item_id}", json={"price": 0.75}, headers=headers)
+    assert _revalidate(client, "/items/", headers, etag, limit=1).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_item_rows_are_locked_before_the_catalog_shards(seeded, async_session_factory):
+    _, item_id = seeded
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[:3])
+
+    async with async_session_factory() as db:
+        event.listen(db.bind.sync_engine, "before_cursor_execute", record)
+        try:
+            item = await db.get(Item, item_id)
+            item.price = 0.6
+            await bump_catalog_version(db, [item_id])
+            await db.commit()
+        finally:
+            event.remove(db.bind.sync_engine, "before_cursor_execute", record)
+
+    writes = [words for words in statements if words[0] in ("UPDATE", "INSERT")]
+    assert writes[0][:2] == ["UPDATE", "items"]
+    assert writes[1] == ["INSERT", "INTO", "catalog_state"]
+
+
+@pytest.mark.anyio
+async def test_catalog_version_sums_its_shards(async_session_factory):
+    async with async_session_factory() as db:
+        assert await catalog_version(db) == 0
+        await bump_catalog_version(db, [1, 2, 1 + settings.CATALOG_VERSION_SHARDS])
+        await bump_catalog_version(db, [2])
+        await bump_catalog_version(db, [])
+        await db.commit()
+        # Items 1 and 1 + N share a shard: one bump for that write
+        assert await catalog_version(db) == 3
@@ -0,0 +1,45 @@
+# tests/unit/test_db_pool.py
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.database import InstrumentedQueuePool, engine, pool_stats
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pool_stats_track_checkouts():
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    before = pool_stats()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        during = pool_stats()
+
+    assert during["checked_out"] == before["checked_out"] + 1
+    assert during["checkouts"] == before["checkouts"] + 1
+    assert pool_stats()["checked_out"] == before["checked_out"]
+
+
+def test_pool_stats_endpoint_is_for_managers(client, auth_headers):
+    assert client.get("/health/db-pool", headers=auth_headers(1)).status_code == 403
+
+    response = client.get("/health/db-pool", headers=auth_headers(1, role="manager"))
+    assert response.status_code == 200
+    assert {"checked_out", "overflow", "capacity", "avg_wait_ms"} <= response.json().keys()
+
+
+async def test_pool_counts_checkout_timeouts(db_path):
+    pool_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    try:
+        async with pool_engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with pool_engine.connect():
+                    pass
+        assert pool_engine.pool.timeouts == 1
+        assert pool_engine.pool.checkouts == 1  # only the one that got a connection
+    finally:
+        await pool_engine.dispose()
@@ -0,0 +1,72 @@
+# tests/unit/test_droplet_metrics.py
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.droplet_metrics import DropletMetricsCollector
+
+pytestmark = pytest.mark.anyio
+
+GIB = 1024 ** 3
+
+
+def _do_api(requests):
+    """Fake DigitalOcean API for one 1 GiB / 10 GiB droplet; records the paths requested."""
+    async def handler(request: httpx.Request):
+        requests.append(request.url.path)
+        await asyncio.sleep(0.05)
+        path = request.url.path
+        if path.endswith("/droplets"):
+            droplets = [{"id": 1, "name": "api", "memory": 1024, "disk": 10, "vcpus": 1, "status": "active"}]
+            return httpx.Response(200, json={"droplets": droplets})
+        if path.endswith("/cpu"):
+            result = [
+                {"metric": {"mode": "idle"}, "values": [[0, "100"], [1, "175"]]},
+                {"metric": {"mode": "user"}, "values": [[0, "10"], [1, "35"]]},
+            ]
+        elif path.endswith("/memory_available"):
+            result = [{"values": [[1, str(GIB // 4)]]}]
+        else:
+            result = [{"metric": {"mountpoint": "/"}, "values": [[1, str(8 * GIB)]]}]
+        return httpx.Response(200, json={"data": {"result": result}})
+    return httpx.MockTransport(handler)
+
+
+async def test_collects_droplet_series_concurrently():
+    requests = []
+    collector = DropletMetricsCollector(token="t", transport=_do_api(requests))
+    await collector.start()
+
+    started = asyncio.get_running_loop().time()
+    metrics = await collector.get()
+    elapsed = asyncio.get_running_loop().time() - started
+
+    droplet = metrics["droplets"][0]
+    assert (droplet["cpu_usage"], droplet["memory_usage"], droplet["disk_usage"]) == (25.0, 75.0, 20.0)
+    # Droplet list, then the three series side by side
+    assert len(requests) == 4
+    assert elapsed < 0.15
+    await collector.stop()
+
+
+async def test_serves_cache_and_refreshes_in_background():
+    requests = []
+    collector = DropletMetricsCollector(token="t", stale_after=0, transport=_do_api(requests))
+    await collector.start()
+    first = await collector.get()
+    assert len(requests) == 4
+
+    # Stale: answered from the cache at once while one refresh runs
+    second, third = await asyncio.gather(collector.get(), collector.get())
+    assert second["droplets"] == third["droplets"] == first["droplets"]
+    await collector._refresh
+    # One refresh for both callers
+    assert len(requests) == 8
+    await collector.stop()
+
+
+async def test_without_token_returns_nothing():
+    collector = DropletMetricsCollector(token=None)
+    await collector.start()
+    assert (await collector.get())["droplets"] == []
@@ -0,0 +1,126 @@
+# tests/unit/test_idempotency.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.idempotency_key import IdempotencyKey
+from app.models.item import Item
+from app.models.transaction import Transaction
+from app.models.user import User, UserRole
+from app.routers import transactions as transactions_router
+from app.services import websocket_manager
+from app.services.idempotency import IdempotencyKeyCleanup
+
+
+@pytest.fixture
+def broadcasts(monkeypatch):
+    sent = []
+
+    async def fake_broadcast(message, item_ids=(), skus=()):
+        sent.append(message)
+
+    monkeypatch.setattr(websocket_manager.manager, "broadcast", fake_broadcast)
+    return sent
+
+
+@pytest.fixture
+def seeded(session_factory, auth_headers):
+    db = session_factory()
+    user = User(username="scanner", email="scanner@ims.local", hashed_password="x", role=UserRole.staff)
+    item = Item(name="Pallet", sku="P-1", quantity=10, low_stock_threshold=2)
+    db.add_all([user, item])
+    db.commit()
+    item_id, user_id = item.id, user.id
+    db.close()
+    return item_id, user_id, auth_headers(user_id)
+
+
+def _state(session_factory):
+    db = session_factory()
+    try:
+        return db.query(Item.quantity).scalar(), db.query(Transaction).count()
+    finally:
+        db.close()
+
+
+def test_retry_with_same_key_replays_original(client, seeded, broadcasts, session_factory):
+    item_id, _, headers = seeded
+    headers = {**headers, "Idempotency-Key": "scan-1"}
+    body = {"item_id": item_id, "type": "in", "quantity": 4}
+
+    first = client.post("/transactions/", json=body, headers=headers)
+    retry = client.post("/transactions/", json=body, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert _state(session_factory) == (14, 1)
+    assert len(broadcasts) == 2  # transaction_created + item_updated, once
+
+    resp = client.post("/transactions/", json={**body, "quantity": 5}, headers=headers)
+    assert resp.status_code == 422
+    assert _state(session_factory) == (14, 1)
+
+
+def test_failed_request_does_not_store_key(client, seeded, broadcasts, session_factory):
+    item_id, _, headers = seeded
+    headers = {**headers, "Idempotency-Key": "scan-2"}
+    resp = client.post("/transactions/", json={"item_id": item_id, "type": "out", "quantity": 50}, headers=headers)
+    assert resp.status_code == 400
+    resp = client.post("/transactions/", json={"item_id": item_id, "type": "out", "quantity": 5}, headers=headers)
+    assert resp.status_code == 200
+    assert _state(session_factory) == (5, 1)
+
+
+def test_batch_retry_replays(client, seeded, broadcasts, session_factory):
+    item_id, _, headers = seeded
+    headers = {**headers, "Idempotency-Key": "batch-1"}
+    body = {"mode": "best_effort", "transactions": [
+        {"item_id": item_id, "type": "out", "quantity": 3},
+        {"item_id": 999, "type": "out", "quantity": 1},
+    ]}
+    first = client.post("/transactions/batch", json=body, headers=headers)
+    retry = client.post("/transactions/batch", json=body, headers=headers)
+    assert retry.json() == first.json()
+    assert len(retry.json()["errors"]) == 1
+    assert _state(session_factory) == (7, 1)
+
+
+def test_concurrent_duplicate_rolls_back_and_replays(client, seeded, broadcasts, session_factory, monkeypatch):
+    item_id, user_id, headers = seeded
+    body = {"item_id": item_id, "type": "in", "quantity": 4}
+    first = client.post("/transactions/", json=body, headers={**headers, "Idempotency-Key": "scan-3"})
+
+    # The duplicate's lookup runs before the first request commits
+    lookups = []
+    original = transactions_router.find_response
+
+    async def racing_find_response(db, user_id, key):
+        lookups.append(key)
+        return None if len(lookups) == 1 else await original(db, user_id, key)
+
+    monkeypatch.setattr(transactions_router, "find_response", racing_find_response)
+    retry = client.post("/transactions/", json=body, headers={**headers, "Idempotency-Key": "scan-3"})
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert _state(session_factory) == (14, 1)
+
+
+@pytest.mark.anyio
+async def test_cleanup_deletes_expired_keys(seeded, session_factory, async_session_factory):
+    _, user_id, _ = seeded
+    db = session_factory()
+    now = datetime.utcnow()
+    for key, age in (("old", timedelta(days=2)), ("new", timedelta(hours=1))):
+        db.add(IdempotencyKey(
+            user_id=user_id, key=key, fingerprint="f", status_code=200, response_body="{}", created_at=now - age,
+        ))
+    db.commit()
+    db.close()
+
+    cleanup = IdempotencyKeyCleanup(session_factory=async_session_factory, ttl=86400)
+    assert await cleanup.run_once() == 1
+    db = session_factory()
+    assert [row.key for row in db.query(IdempotencyKey)] == ["new"]
+    db.close()
@@ -1,42 +1,13 @@
 # tests/unit/test_inventory.py
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.main import app
-from app.database import Base, get_db
 from app.core.security import hash_password
 from app.models.user import User, UserRole
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"  # or "sqlite:///:memory:"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-@pytest.fixture(scope="session", autouse=True)
-def create_test_db():
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-@pytest.fixture
-def client():
-    return TestClient(app)
-
 @pytest.fixture
-def manager_user():
-    db = TestingSessionLocal()
+def manager_user(session_factory):
+    db = session_factory()
     user = User(
+        username="manager",
         email="manager@test.com",
         hashed_password=hash_password("password"),
         role=UserRole.manager,
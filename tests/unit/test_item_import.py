@@ -0,0 +1,129 @@
+# tests/unit/test_item_import.py
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+from app.models.item import Item
+from app.models.user import User, UserRole
+from app.services import item_import, websocket_manager
+from app.services.catalog_version import catalog_version
+from app.services.item_import import import_item_file
+
+
+@pytest.fixture
+def broadcasts(monkeypatch):
+    sent = []
+
+    async def fake_broadcast(message, item_ids=(), skus=()):
+        sent.append(message)
+
+    monkeypatch.setattr(websocket_manager.manager, "broadcast", fake_broadcast)
+    return sent
+
+
+@pytest.fixture
+def headers(session_factory, auth_headers):
+    db = session_factory()
+    user = User(username="boss", email="boss@ims.local", hashed_password="x", role=UserRole.manager)
+    db.add_all([user, Item(name="Bolt", sku="B-1", quantity=3, low_stock_threshold=5, price=0.5)])
+    db.commit()
+    user_id = user.id
+    db.close()
+    return auth_headers(user_id, role="manager")
+
+
+def _items(session_factory):
+    db = session_factory()
+    try:
+        return {item.sku: (item.name, item.quantity, item.price, item.version) for item in db.query(Item)}
+    finally:
+        db.close()
+
+
+def _upload(client, headers, name, content, **params):
+    return client.post(
+        "/items/import", params=params, headers=headers, files={"file": (name, content.encode())}
+    )
+
+
+def test_csv_import_upserts_and_reports_bad_rows(client, headers, broadcasts, session_factory):
+    content = (
+        "sku,name,quantity,price\n"
+        "B-1,Bolt,3,0.75\n"
+        "N-1,Nut,40,0.2\n"
+        "X-1,Broken,-1,1\n"
+        ",Nameless,1,1\n"
+        "W-1,Washer,7,0.1\n"
+        "W-1,Washer,8,0.1\n"
+    )
+    resp = _upload(client, headers, "catalog.csv", content)
+    assert resp.status_code == 200
+    report = resp.json()
+    assert {key: report[key] for key in ("rows", "created", "updated", "unchanged", "superseded", "failed")} == {
+        "rows": 6, "created": 2, "updated": 1, "unchanged": 0, "superseded": 1, "failed": 2,
+    }
+    assert [(error["line"], error["sku"]) for error in report["errors"]] == [(4, "X-1"), (5, None)]
+    assert "quantity" in report["errors"][0]["detail"]
+
+    assert _items(session_factory) == {
+        "B-1": ("Bolt", 3, 0.75, 2),
+        "N-1": ("Nut", 40, 0.2, 1),
+        "W-1": ("Washer", 8, 0.1, 1),
+    }
+    assert broadcasts == [
+        {"type": "items_imported", "data": {"created": 2, "updated": 1, "failed": 2}}
+    ]
+
+
+def test_ndjson_import_updates_only_given_columns(client, headers, broadcasts, session_factory):
+    lines = [{"sku": "B-1", "name": "Hex bolt"}, {"sku": "N-1", "name": "Nut", "quantity": 4}]
+    content = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+    resp = _upload(client, headers, "catalog.jsonl", content)
+    report = resp.json()
+    assert (report["created"], report["updated"], report["failed"]) == (1, 1, 1)
+    assert report["errors"][0]["line"] == 3
+    assert _items(session_factory)["B-1"] == ("Hex bolt", 3, 0.5, 2)
+
+    # The same file again changes nothing, so versions and ETags stay put
+    report = _upload(client, headers, "catalog.jsonl", content).json()
+    assert (report["created"], report["updated"], report["unchanged"]) == (0, 0, 2)
+    assert _items(session_factory)["B-1"][3] == 2
+    assert len(broadcasts) == 1
+
+
+def test_csv_import_requires_sku_and_name(client, headers):
+    resp = _upload(client, headers, "catalog.csv", "sku,quantity\nB-1,4\n")
+    assert resp.status_code == 400
+    assert "name" in resp.json()["detail"]
+
+
+@pytest.mark.anyio
+async def test_import_commits_chunk_by_chunk(headers, async_session_factory):
+    rows = "".join(f"S-{i},Screw {i},{i}\n" for i in range(5))
+    async with async_session_factory() as db:
+        report = await import_item_file(db, io.BytesIO(b"sku,name,quantity\n" + rows.encode()), "csv", chunk_size=2)
+        assert (report.rows, report.created) == (5, 5)
+        assert len(set(await db.scalars(select(Item.sku).where(Item.sku.like("S-%"))))) == 5
+        # One catalog version bump per item written
+        assert await catalog_version(db) == 5
+
+
+@pytest.mark.anyio
+async def test_rejected_chunk_is_retried_row_by_row(headers, async_session_factory, monkeypatch):
+    upsert_group = item_import._upsert_group
+
+    async def reject_bad_sku(db, values, provided):
+        if any(row["sku"] == "BAD-1" for row in values):
+            raise DBAPIError("INSERT", {}, Exception("value too long"))
+        return await upsert_group(db, values, provided)
+
+    monkeypatch.setattr(item_import, "_upsert_group", reject_bad_sku)
+    content = b"sku,name\nS-1,Screw\nBAD-1,Bad\nS-2,Spring\n"
+    async with async_session_factory() as db:
+        report = await import_item_file(db, io.BytesIO(content), "csv")
+        assert (report.created, report.failed) == (2, 1)
+        assert report.errors == [{"line": 3, "sku": "BAD-1", "detail": "Rejected by the database: value too long"}]
+        assert set(await db.scalars(select(Item.sku).where(Item.sku != "B-1"))) == {"S-1", "S-2"}
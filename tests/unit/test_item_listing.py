@@ -0,0 +1,111 @@
+# tests/unit/test_item_listing.py
+import pytest
+from sqlalchemy import text
+
+from app.models.item import Item
+from app.schemas.item import ItemRead
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def headers(session_factory, auth_headers):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role=UserRole.staff)
+    db.add(user)
+    db.add_all([
+        Item(name="Bolt", sku="B-1", quantity=3, low_stock_threshold=5, price=0.5),
+        Item(name="Nut", sku="N-1", quantity=40, low_stock_threshold=5, price=0.2),
+        Item(name="Drill", sku="D-1", quantity=2, low_stock_threshold=1, price=80.0),
+        Item(name="Saw", sku="S-1", quantity=5, low_stock_threshold=5, price=25.0),
+        Item(name="Tape", sku="T-1", quantity=12, low_stock_threshold=5, price=4.0),
+    ])
+    db.commit()
+    user_id = user.id
+    db.close()
+    return auth_headers(user_id)
+
+
+def _walk(client, headers, **params):
+    names, cursor = [], None
+    while True:
+        page_params = dict(params, limit=2, include_total=False)
+        if cursor:
+            page_params["cursor"] = cursor
+        resp = client.get("/items/", params=page_params, headers=headers)
+        assert resp.status_code == 200
+        assert "X-Total-Count" not in resp.headers
+        names.extend(item["name"] for item in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return names
+
+
+def test_list_items_sorted_pages(client, headers):
+    assert _walk(client, headers) == ["Bolt", "Drill", "Nut", "Saw", "Tape"]
+    assert _walk(client, headers, sort="price", order="desc") == [
+        "Drill", "Saw", "Tape", "Bolt", "Nut",
+    ]
+
+
+def test_list_items_filters_and_total(client, headers):
+    resp = client.get(
+        "/items/", params={"below_threshold": True, "max_price": 30}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert [item["sku"] for item in resp.json()] == ["B-1", "S-1"]
+    assert resp.headers["X-Total-Count"] == "2"
+
+    resp = client.get(
+        "/items/", params={"min_quantity": 3, "max_quantity": 12, "sort": "quantity"},
+        headers=headers,
+    )
+    assert [item["quantity"] for item in resp.json()] == [3, 5, 12]
+
+
+def test_list_items_rows_match_response_model(client, headers, session_factory):
+    resp = client.get("/items/", headers=headers)
+    db = session_factory()
+    expected = [
+        ItemRead.model_validate(item).model_dump(mode="json")
+        for item in db.query(Item).order_by(Item.name, Item.id)
+    ]
+    db.close()
+    assert resp.headers["content-type"] == "application/json"
+    assert resp.json() == expected
+    assert list(resp.json()[0]) == list(ItemRead.model_fields)
+
+
+def test_list_items_rejects_cursor_from_other_sort(client, headers):
+    resp = client.get("/items/", params={"limit": 1}, headers=headers)
+    cursor = resp.headers["X-Next-Cursor"]
+    resp = client.get("/items/", params={"cursor": cursor, "sort": "price"}, headers=headers)
+    assert resp.status_code == 400
+
+
+def test_low_stock_items_follow_updates(client, headers):
+    resp = client.get("/items/low-stock", params={"limit": 1}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["X-Total-Count"] == "2"
+    assert [item["sku"] for item in resp.json()] == ["B-1"]
+    resp = client.get(
+        "/items/low-stock", params={"cursor": resp.headers["X-Next-Cursor"]}, headers=headers
+    )
+    assert [item["sku"] for item in resp.json()] == ["S-1"]
+    assert "X-Next-Cursor" not in resp.headers
+
+    items = {item["sku"]: item["id"] for item in client.get("/items/", headers=headers).json()}
+    client.put(f"/items/{items['T-1']}", json={"low_stock_threshold": 20}, headers=headers)
+    client.put(f"/items/{items['B-1']}", json={"quantity": 30}, headers=headers)
+
+    resp = client.get("/items/low-stock", headers=headers)
+    assert [item["sku"] for item in resp.json()] == ["S-1", "T-1"]
+
+
+def test_low_stock_query_uses_partial_index(session_factory):
+    db = session_factory()
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM items "
+        "WHERE items.quantity <= items.low_stock_threshold ORDER BY quantity, id"
+    )).all()
+    db.close()
+    assert "ix_items_low_stock" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,32 @@
+# tests/unit/test_metrics.py
+from prometheus_client import REGISTRY
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_counted_by_route_template(client, auth_headers):
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "404"}
+    before = _sample("ims_http_requests_total", **labels)
+
+    client.get("/items/41", headers=auth_headers(1))
+    client.get("/items/42", headers=auth_headers(1))
+
+    assert _sample("ims_http_requests_total", **labels) == before + 2
+    assert _sample("ims_http_request_duration_seconds_count", **labels) == before + 2
+
+
+def test_metrics_endpoint_serves_prometheus_text(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    for name in (
+        "ims_http_request_duration_seconds_bucket",
+        "ims_db_pool_checked_out",
+        "ims_websocket_connections",
+        "ims_websocket_send_queue_depth",
+    ):
+        assert name in body
@@ -0,0 +1,114 @@
+# tests/unit/test_movement_rollups.py
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.models.item import Item
+from app.models.movement_rollup import MovementRollup
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User, UserRole
+from app.services.movement_rollups import rebuild, utc_day
+from app.services.transaction_service import apply_stock_change, apply_stock_changes
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def ids(session_factory):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role=UserRole.staff)
+    mouse = Item(name="Mouse", sku="M-1", quantity=100)
+    cable = Item(name="Cable", sku="C-1", quantity=100)
+    db.add_all([user, mouse, cable])
+    db.commit()
+    ids = {"user": user.id, "mouse": mouse.id, "cable": cable.id}
+    db.close()
+    return ids
+
+
+async def _rollups(db):
+    rows = await db.scalars(select(MovementRollup).order_by(MovementRollup.item_id, MovementRollup.day))
+    return [
+        (r.item_id, r.day, r.quantity_in, r.quantity_out, r.transactions_in, r.transactions_out)
+        for r in rows
+    ]
+
+
+async def test_stock_changes_update_rollups_in_the_same_commit(ids, async_session_factory):
+    today = datetime.utcnow().date()
+    async with async_session_factory() as db:
+        await apply_stock_change(db, ids["mouse"], "in", 5, ids["user"])
+        await apply_stock_change(db, ids["mouse"], "out", 2, ids["user"])
+        await apply_stock_changes(db, [
+            SimpleNamespace(item_id=ids["mouse"], type="out", quantity=1),
+            SimpleNamespace(item_id=ids["cable"], type="in", quantity=7),
+            SimpleNamespace(item_id=ids["cable"], type="in", quantity=3),
+        ], ids["user"])
+
+        assert await _rollups(db) == [
+            (ids["mouse"], today, 5, 3, 1, 2),
+            (ids["cable"], today, 10, 0, 2, 0),
+        ]
+
+        # A rejected change leaves no trace in the rollups either
+        with pytest.raises(Exception):
+            await apply_stock_change(db, ids["cable"], "out", 1000, ids["user"])
+        assert (await _rollups(db))[1] == (ids["cable"], today, 10, 0, 2, 0)
+
+
+async def test_rebuild_recomputes_history(ids, session_factory, async_session_factory):
+    db = session_factory()
+    for day, item, quantity, type in (
+        (1, "mouse", 4, TransactionType.IN),
+        (1, "mouse", 1, TransactionType.OUT),
+        (2, "mouse", 2, TransactionType.OUT),
+        (2, "cable", 9, TransactionType.IN),
+    ):
+        db.add(Transaction(
+            user_id=ids["user"], item_id=ids[item], quantity=quantity, type=type,
+            created_at=datetime(2024, 3, day, 12),
+        ))
+    db.commit()
+    db.close()
+
+    async with async_session_factory() as db:
+        assert await rebuild(db) == 3
+        assert await _rollups(db) == [
+            (ids["mouse"], date(2024, 3, 1), 4, 1, 1, 1),
+            (ids["mouse"], date(2024, 3, 2), 0, 2, 0, 1),
+            (ids["cable"], date(2024, 3, 2), 9, 0, 1, 0),
+        ]
+        # Rebuilding part of the history leaves earlier days alone
+        assert await rebuild(db, since=date(2024, 3, 2)) == 2
+        assert len(await _rollups(db)) == 3
+
+
+def test_analytics_endpoints_read_rollups(client, ids, session_factory, auth_headers):
+    db = session_factory()
+    db.add_all([
+        # 2024-03-04 is a Monday
+        MovementRollup(item_id=ids["mouse"], day=date(2024, 3, 4), quantity_in=5, quantity_out=1, transactions_in=1, transactions_out=1),
+        MovementRollup(item_id=ids["mouse"], day=date(2024, 3, 6), quantity_in=0, quantity_out=8, transactions_in=0, transactions_out=2),
+        MovementRollup(item_id=ids["cable"], day=date(2024, 3, 6), quantity_in=20, quantity_out=3, transactions_in=1, transactions_out=1),
+    ])
+    db.commit()
+    db.close()
+    headers = auth_headers(ids["user"], role="manager")
+    params = {"since": "2024-03-01", "until": "2024-03-10"}
+
+    weekly = client.get("/analytics/movements", params={**params, "granularity": "week"}, headers=headers).json()
+    mouse = next(p for p in weekly if p["item_id"] == ids["mouse"])
+    assert (mouse["period_start"], mouse["quantity_in"], mouse["quantity_out"]) == ("2024-03-04", 5, 9)
+
+    movers = client.get("/analytics/top-movers", params=params, headers=headers).json()
+    assert [(m["sku"], m["moved"]) for m in movers] == [("M-1", 9), ("C-1", 3)]
+
+    assert client.get("/analytics/top-movers", headers=auth_headers(ids["user"])).status_code == 403
+
+
+def test_utc_day_normalizes_aware_timestamps():
+    tz = timezone(timedelta(hours=-5))
+    assert utc_day(datetime(2024, 3, 1, 21, 30, tzinfo=tz)) == date(2024, 3, 2)
+    assert utc_day(datetime(2024, 3, 1, 21, 30)) == date(2024, 3, 1)
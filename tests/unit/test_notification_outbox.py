@@ -0,0 +1,156 @@
+# tests/unit/test_notification_outbox.py
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.models.item import Item
+from app.models.notification import NotificationOutbox, OutboxStatus
+from app.models.user import User
+from app.services.outbox_worker import OutboxWorker
+from app.services.transaction_service import apply_stock_change
+
+pytestmark = pytest.mark.anyio
+
+
+def _worker(async_session_factory, handler, **kwargs):
+    """A worker with its HTTP client but no polling task; tests call drain_once themselves."""
+    worker = OutboxWorker(
+        session_factory=async_session_factory,
+        email_url="https://email.test/send",
+        api_key="secret",
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+    worker.open_client()
+    return worker
+
+
+def _seed(session_factory, quantity=3):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role="staff")
+    item = Item(name="Mouse", sku="M-1", quantity=quantity, low_stock_threshold=2)
+    db.add_all([user, item])
+    db.commit()
+    ids = user.id, item.id
+    db.close()
+    return ids
+
+
+def _outbox(session_factory):
+    db = session_factory()
+    try:
+        return db.query(NotificationOutbox).order_by(NotificationOutbox.id).all()
+    finally:
+        db.close()
+
+
+async def test_low_stock_change_is_queued_then_delivered(session_factory, async_session_factory):
+    user_id, item_id = _seed(session_factory)
+    async with async_session_factory() as db:
+        await apply_stock_change(db, item_id, "out", 2, user_id)
+
+    [row] = _outbox(session_factory)
+    assert row.status == OutboxStatus.pending.value
+    assert row.payload["text"].endswith("M-1 has only 1 left!")
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200)
+
+    worker = _worker(async_session_factory, handler)
+    try:
+        assert await worker.drain_once() == 1
+    finally:
+        await worker.stop()
+
+    assert requests[0].headers["Authorization"] == "Bearer secret"
+    [row] = _outbox(session_factory)
+    assert row.status == OutboxStatus.sent.value
+    assert row.attempts == 1
+
+
+async def test_stock_change_above_threshold_queues_nothing(session_factory, async_session_factory):
+    user_id, item_id = _seed(session_factory, quantity=10)
+    async with async_session_factory() as db:
+        await apply_stock_change(db, item_id, "out", 2, user_id)
+    assert _outbox(session_factory) == []
+
+
+async def test_failed_delivery_backs_off_then_gives_up(session_factory, async_session_factory):
+    db = session_factory()
+    db.add(NotificationOutbox(kind="email", payload={"subject": "s", "text": "t"}))
+    db.commit()
+    db.close()
+
+    worker = _worker(
+        async_session_factory, lambda request: httpx.Response(503), max_attempts=2
+    )
+    try:
+        assert await worker.drain_once() == 1
+        [row] = _outbox(session_factory)
+        assert row.status == OutboxStatus.pending.value
+        assert row.next_attempt_at > datetime.utcnow()
+        # Not due yet, so the next drain leaves it alone.
+        assert await worker.drain_once() == 0
+
+        db = session_factory()
+        db.query(NotificationOutbox).update(
+            {"next_attempt_at": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.commit()
+        db.close()
+        assert await worker.drain_once() == 1
+    finally:
+        await worker.stop()
+
+    [row] = _outbox(session_factory)
+    assert row.status == OutboxStatus.failed.value
+    assert row.attempts == 2
+    assert "503" in row.last_error
+
+
+async def test_batch_is_leased_and_committed_before_sending(session_factory, async_session_factory):
+    db = session_factory()
+    db.add(NotificationOutbox(kind="email", payload={"subject": "s", "text": "t"}))
+    db.commit()
+    db.close()
+
+    seen = []
+
+    def handler(request):
+        # Visible to other connections, so no transaction is held while sending
+        [row] = _outbox(session_factory)
+        seen.append(row.next_attempt_at)
+        return httpx.Response(200)
+
+    worker = _worker(async_session_factory, handler, lease=60)
+    try:
+        assert await worker.drain_once() == 1
+    finally:
+        await worker.stop()
+
+    assert seen[0] > datetime.utcnow() + timedelta(seconds=30)
+    [row] = _outbox(session_factory)
+    assert (row.status, row.attempts) == (OutboxStatus.sent.value, 1)
+
+
+async def test_delete_sent_keeps_recent_and_failed_rows(session_factory, async_session_factory):
+    old = datetime.utcnow() - timedelta(days=30)
+    db = session_factory()
+    db.add_all([
+        NotificationOutbox(kind="email", payload={}, status=OutboxStatus.sent.value, sent_at=old),
+        NotificationOutbox(kind="email", payload={}, status=OutboxStatus.sent.value, sent_at=datetime.utcnow()),
+        NotificationOutbox(kind="email", payload={}, status=OutboxStatus.failed.value),
+    ])
+    db.commit()
+    db.close()
+
+    worker = _worker(async_session_factory, lambda request: httpx.Response(200), sent_retention=86400)
+    try:
+        assert await worker.delete_sent() == 1
+    finally:
+        await worker.stop()
+    assert len(_outbox(session_factory)) == 2
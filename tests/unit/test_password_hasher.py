@@ -0,0 +1,68 @@
+# tests/unit/test_password_hasher.py
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.models.user import User, UserRole
+from app.services import password_hasher as hasher_module
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rejects_requests_beyond_max_pending():
+    release = threading.Event()
+
+    class SlowContext:
+        def hash(self, password):
+            release.wait(5)
+            return "hashed"
+
+    hasher = PasswordHasher(workers=1, max_pending=2, context=SlowContext())
+    running = [asyncio.ensure_future(hasher.hash("pw")) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("pw")
+    assert hasher.stats()["queued"] == 1
+
+    release.set()
+    assert await asyncio.gather(*running) == ["hashed", "hashed"]
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["completed"]["hash"] == 2
+    hasher.shutdown()
+
+
+async def test_verify_returns_new_hash_when_cost_changes():
+    old = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    hasher = PasswordHasher(workers=1, context=CryptContext(schemes=["bcrypt"], bcrypt__rounds=5))
+    hashed = old.hash("secret")
+
+    assert await hasher.verify_and_update("wrong", hashed) == (False, None)
+    ok, new_hash = await hasher.verify_and_update("secret", hashed)
+    assert ok and new_hash.startswith("$2b$05$")
+    assert hasher.stats()["rehashed"] == 1
+    hasher.shutdown()
+
+
+def test_login_rehashes_outdated_password(client, session_factory, monkeypatch):
+    monkeypatch.setattr(
+        hasher_module.password_hasher, "context", CryptContext(schemes=["bcrypt"], bcrypt__rounds=5)
+    )
+    db = session_factory()
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    user = User(username="alice", email="alice@ims.local", hashed_password=old_hash, role=UserRole.staff)
+    db.add(user)
+    db.commit()
+
+    response = client.post("/auth/login", data={"username": "alice", "password": "secret"})
+    assert response.status_code == 200
+
+    db.expire_all()
+    user = db.get(User, user.id)
+    assert user.hashed_password.startswith("$2b$05$")
+    # Rehashing is not a password change; outstanding tokens stay valid
+    assert user.token_version == 0
+    db.close()
@@ -0,0 +1,90 @@
+# tests/unit/test_principal_cache.py
+import time
+
+import pytest
+
+from app.models.user import User, UserRole
+from app.services.principals import principal_cache
+
+
+@pytest.fixture
+def user_id(session_factory):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role=UserRole.staff)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+@pytest.fixture
+def stale_claims(monkeypatch):
+    """Make every role claim too old to trust, forcing principal resolution."""
+    monkeypatch.setattr(principal_cache, "role_claim_max_age", -1)
+
+
+def _update_user(session_factory, user_id, **changes):
+    db = session_factory()
+    user = db.get(User, user_id)
+    for name, value in changes.items():
+        setattr(user, name, value)
+    db.commit()
+    db.close()
+
+
+def test_principal_is_cached_after_first_lookup(client, user_id, auth_headers, stale_claims):
+    headers = auth_headers(user_id)
+    assert principal_cache.get(user_id, 0) is None
+
+    assert client.get("/items/", headers=headers).status_code == 200
+    assert principal_cache.get(user_id, 0).role == UserRole.staff
+    assert client.get("/items/", headers=headers).status_code == 200
+
+
+def test_fresh_role_claim_is_trusted_without_lookup(client, auth_headers):
+    # No such user in the database; the signed, fresh claim is enough
+    assert client.get("/items/", headers=auth_headers(999)).status_code == 200
+    assert principal_cache.get(999, 0) is None
+
+
+def test_role_change_revokes_outstanding_tokens(client, session_factory, user_id, auth_headers, stale_claims):
+    headers = auth_headers(user_id)
+    assert client.get("/items/", headers=headers).status_code == 200
+
+    _update_user(session_factory, user_id, role=UserRole.manager)
+
+    assert principal_cache.get(user_id, 0) is None
+    assert client.get("/items/", headers=headers).status_code == 401
+    # A token carrying the new version resolves the new role
+    new_headers = auth_headers(user_id, role="manager", version=1)
+    assert client.get("/users/", headers=new_headers).status_code == 200
+
+
+def test_deactivation_rejects_fresh_tokens(client, session_factory, user_id, auth_headers):
+    headers = auth_headers(user_id)
+    assert client.get("/items/", headers=headers).status_code == 200
+
+    _update_user(session_factory, user_id, is_active=False)
+
+    # Issued before the change, so the claim is no longer trusted
+    assert client.get("/items/", headers=headers).status_code == 401
+
+
+def test_unrelated_change_keeps_tokens_valid(client, session_factory, user_id, auth_headers, stale_claims):
+    headers = auth_headers(user_id)
+    _update_user(session_factory, user_id, full_name="Dock Staff")
+
+    assert client.get("/items/", headers=headers).status_code == 200
+
+
+def test_invalidations_are_forgotten_once_claims_are_too_old(monkeypatch):
+    monkeypatch.setattr(principal_cache, "_invalidated_at", {})
+    monkeypatch.setattr(principal_cache, "role_claim_max_age", 300)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now - 400)
+    principal_cache.invalidate(1, publish=False)
+    monkeypatch.setattr(time, "time", lambda: now)
+    principal_cache.invalidate(2, publish=False)
+
+    assert list(principal_cache._invalidated_at) == [2]
@@ -0,0 +1,69 @@
+# tests/unit/test_service_logs.py
+import asyncio
+import sys
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.services import service_logs as service_logs_module
+from app.services.service_logs import ServiceLogFollower, ServiceLogStreams
+
+pytestmark = pytest.mark.anyio
+
+# Stands in for `docker logs --follow`: two lines, then nothing for a while
+SCRIPT = "import time; print('one', flush=True); print('two', flush=True); time.sleep(5)"
+
+
+def _follower(buffer_lines=10):
+    return ServiceLogFollower(
+        "svc", buffer_lines=buffer_lines, command=[sys.executable, "-c", SCRIPT]
+    )
+
+
+async def test_tail_comes_from_the_ring_buffer():
+    follower = _follower(buffer_lines=1)
+    assert await follower.tail(5, wait=5) in (["one"], ["two"])
+    await asyncio.sleep(0.2)
+    assert await follower.tail(5) == ["two"]
+    await follower.stop()
+
+
+async def test_one_reader_fans_out_to_every_subscriber():
+    follower = _follower()
+    first, second = follower.subscribe(), follower.subscribe()
+    assert [await asyncio.wait_for(first.get(), 5) for _ in range(2)] == ["one", "two"]
+    assert [await asyncio.wait_for(second.get(), 5) for _ in range(2)] == ["one", "two"]
+
+    follower._publish("three")
+    assert first.get_nowait() == second.get_nowait() == "three"
+
+    follower.unsubscribe(second)
+    follower._publish("four")
+    assert first.get_nowait() == "four" and second.empty()
+    await follower.stop()
+
+
+async def test_unknown_service_is_refused():
+    streams = ServiceLogStreams(services=["svc"])
+    with pytest.raises(KeyError):
+        streams.follower("postgres")
+
+
+def test_log_websocket_streams_tail_then_lines(client, auth_headers, monkeypatch):
+    streams = ServiceLogStreams(services=["svc"])
+    streams._followers["svc"] = _follower()
+    monkeypatch.setattr(service_logs_module.service_logs, "_followers", streams._followers)
+    monkeypatch.setattr(service_logs_module.service_logs, "services", ["svc"])
+    token = auth_headers(1, role="manager")["Authorization"].split()[1]
+
+    with client.websocket_connect(f"/health/service-logs/svc/ws?token={token}&lines=5") as ws:
+        message = ws.receive_json()
+        assert message["type"] == "log_tail"
+        assert message["lines"][0] == "one"
+
+
+def test_log_websocket_requires_a_manager(client, auth_headers):
+    token = auth_headers(1)["Authorization"].split()[1]
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/health/service-logs/ims_stack_api/ws?token={token}") as ws:
+            ws.receive_json()
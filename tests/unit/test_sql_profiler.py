@@ -0,0 +1,45 @@
+# tests/unit/test_sql_profiler.py
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.services import sql_profiler
+
+
+def _profiled_app(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    sql_profiler.install(engine)
+    app = FastAPI()
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware, repeat_threshold=3, log_min_statements=100)
+
+    @app.get("/items/{count}")
+    async def items(count: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            for item_id in range(count):
+                await conn.execute(text("SELECT :id"), {"id": item_id})
+        return {}
+
+    return TestClient(app)
+
+
+def test_server_timing_counts_statements(db_path):
+    response = _profiled_app(db_path).get("/items/2")
+
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert 'desc="3 statements"' in timing
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(db_path, caplog):
+    with caplog.at_level(logging.WARNING, logger=sql_profiler.__name__):
+        response = _profiled_app(db_path).get("/items/4")
+
+    assert "5 statements, 1 repeated (N+1?)" in response.headers["server-timing"]
+    assert "likely N+1: 4x SELECT ?" in caplog.text
+    assert "GET /items/{count}" in caplog.text
+
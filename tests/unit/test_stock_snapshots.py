@@ -0,0 +1,121 @@
+# tests/unit/test_stock_snapshots.py
+import asyncio
+import warnings
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.models.item import Item
+from app.models.stock_snapshot import StockSnapshot
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User, UserRole
+from app.services.stock_snapshots import StockSnapshotJob, snapshot_boundary, stock_at, take_snapshot
+
+DAY1, DAY2, DAY3 = datetime(2024, 3, 1), datetime(2024, 3, 2), datetime(2024, 3, 3)
+
+
+@pytest.fixture
+def seeded(session_factory, auth_headers):
+    """An item that started at 10 and moved +5, -4, +2 on three days (now 13)."""
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role=UserRole.staff)
+    item = Item(name="Mouse", sku="M-1", quantity=13, created_at=DAY1 - timedelta(days=30))
+    db.add_all([user, item])
+    db.commit()
+    for day, quantity, type in ((DAY1, 5, TransactionType.IN), (DAY2, 4, TransactionType.OUT), (DAY3, 2, TransactionType.IN)):
+        db.add(Transaction(
+            user_id=user.id, item_id=item.id, quantity=quantity, type=type,
+            created_at=day + timedelta(hours=10),
+        ))
+    db.commit()
+    ids = {"user": user.id, "item": item.id}
+    db.close()
+    return ids, auth_headers(ids["user"])
+
+
+def test_snapshot_boundary_waits_for_settle_delay():
+    assert snapshot_boundary(datetime(2024, 4, 1, 0, 3), 86400, 300) == datetime(2024, 3, 31)
+    assert snapshot_boundary(datetime(2024, 4, 1, 0, 6), 86400, 300) == datetime(2024, 4, 1)
+
+
+def test_stock_at_without_snapshots_rolls_back_live_quantity(client, seeded):
+    ids, headers = seeded
+    response = client.get(
+        f"/items/{ids['item']}/stock-at", params={"ts": "2024-03-01T05:00:00+00:00"}, headers=headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["quantity"], body["basis"], body["transactions_applied"]) == (10, "current", 3)
+    assert body["approximate"] is True
+
+
+@pytest.mark.anyio
+async def test_stock_at_uses_nearest_snapshot(seeded, async_session_factory):
+    ids, _ = seeded
+    async with async_session_factory() as db:
+        assert await take_snapshot(db, DAY2) == 1
+        assert await take_snapshot(db, DAY3) == 1
+        assert await take_snapshot(db, DAY3) == 0  # already taken
+
+        item = await db.get(Item, ids["item"])
+        for ts, quantity, basis_at, applied in (
+            (DAY1 + timedelta(hours=5), 10, DAY2, 1),   # before every snapshot: roll back
+            (DAY1 + timedelta(hours=12), 15, DAY2, 0),
+            (DAY2 + timedelta(hours=12), 11, DAY2, 1),  # roll forward
+            (DAY3 + timedelta(hours=12), 13, DAY3, 1),
+        ):
+            result = await stock_at(db, item, ts)
+            assert (result["quantity"], result["basis_at"], result["transactions_applied"]) == (
+                quantity, basis_at, applied
+            ), ts
+
+
+@pytest.mark.anyio
+async def test_stock_at_rolls_back_live_quantity_in_one_query(seeded, async_session_factory):
+    ids, _ = seeded
+    async with async_session_factory() as db:
+        item = await db.get(Item, ids["item"])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # e.g. a cartesian product SAWarning
+            result = await stock_at(db, item, DAY2)
+    assert (result["quantity"], result["basis"], result["transactions_applied"]) == (15, "current", 2)
+
+
+@pytest.mark.anyio
+async def test_snapshot_job_deletes_snapshots_past_retention(seeded, async_session_factory):
+    async with async_session_factory() as db:
+        await take_snapshot(db, DAY2)
+    job = StockSnapshotJob(session_factory=async_session_factory, interval=86400, settle=0, retention_days=30)
+    assert await job.run_once() == 1
+
+    async with async_session_factory() as db:
+        taken = list(await db.scalars(select(StockSnapshot.taken_at)))
+    assert taken == [snapshot_boundary(datetime.utcnow(), 86400, 0)]
+
+
+@pytest.mark.anyio
+async def test_snapshot_skips_items_created_after_the_boundary(seeded, session_factory, async_session_factory):
+    db = session_factory()
+    db.add(Item(name="Keyboard", sku="K-1", quantity=4))  # created now
+    db.commit()
+    db.close()
+    async with async_session_factory() as db:
+        assert await take_snapshot(db, DAY1) == 1
+
+
+def test_stock_at_ignores_later_quantity_edits(client, seeded, async_session_factory):
+    ids, headers = seeded
+
+    async def snapshot():
+        async with async_session_factory() as db:
+            await take_snapshot(db, DAY1)
+
+    asyncio.run(snapshot())
+    # An edit without a ledger row; it must not leak into earlier answers
+    assert client.put(f"/items/{ids['item']}", json={"quantity": 100}, headers=headers).status_code == 200
+
+    ts = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+    body = client.get(f"/items/{ids['item']}/stock-at", params={"ts": ts}, headers=headers).json()
+    assert (body["quantity"], body["basis"], body["transactions_applied"]) == (13, "snapshot", 3)
+    assert body["approximate"] is False
@@ -0,0 +1,84 @@
+# tests/unit/test_transaction_batch.py
+import pytest
+
+from app.models.item import Item
+from app.models.notification import NotificationOutbox
+from app.models.transaction import Transaction
+from app.models.user import User, UserRole
+from app.services import websocket_manager
+
+
+@pytest.fixture
+def broadcasts(monkeypatch):
+    sent = []
+
+    async def fake_broadcast(message, item_ids=(), skus=()):
+        sent.append(message)
+
+    monkeypatch.setattr(websocket_manager.manager, "broadcast", fake_broadcast)
+    return sent
+
+
+@pytest.fixture
+def seeded(session_factory, auth_headers):
+    db = session_factory()
+    user = User(username="dock", email="dock@ims.local", hashed_password="x", role=UserRole.staff)
+    pallet = Item(name="Pallet", sku="P-1", quantity=10, low_stock_threshold=2)
+    crate = Item(name="Crate", sku="C-1", quantity=1, low_stock_threshold=0)
+    db.add_all([user, pallet, crate])
+    db.commit()
+    ids = {"pallet": pallet.id, "crate": crate.id}
+    user_id = user.id
+    db.close()
+    return ids, auth_headers(user_id)
+
+
+def _quantities(session_factory):
+    db = session_factory()
+    try:
+        return {item.sku: item.quantity for item in db.query(Item).all()}, db.query(Transaction).count()
+    finally:
+        db.close()
+
+
+def test_batch_all_or_nothing_rejects_whole_batch(client, seeded, broadcasts, session_factory):
+    ids, headers = seeded
+    resp = client.post("/transactions/batch", headers=headers, json={
+        "transactions": [
+            {"item_id": ids["pallet"], "type": "out", "quantity": 4},
+            {"item_id": ids["crate"], "type": "out", "quantity": 2},
+            {"item_id": 999, "type": "in", "quantity": 1},
+        ],
+    })
+    assert resp.status_code == 400
+    assert [error["index"] for error in resp.json()["detail"]] == [1, 2]
+    assert _quantities(session_factory) == ({"P-1": 10, "C-1": 1}, 0)
+    assert broadcasts == []
+
+
+def test_batch_best_effort_applies_valid_movements(client, seeded, broadcasts, session_factory):
+    ids, headers = seeded
+    resp = client.post("/transactions/batch", headers=headers, json={
+        "mode": "best_effort",
+        "transactions": [
+            {"item_id": ids["pallet"], "type": "out", "quantity": 4},
+            {"item_id": ids["crate"], "type": "out", "quantity": 2},
+            {"item_id": ids["crate"], "type": "in", "quantity": 5},
+            {"item_id": ids["pallet"], "type": "out", "quantity": 5},
+        ],
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert [tx["quantity"] for tx in body["transactions"]] == [4, 5, 5]
+    assert [error["index"] for error in body["errors"]] == [1]
+    assert _quantities(session_factory) == ({"P-1": 1, "C-1": 6}, 3)
+
+    assert len(broadcasts) == 1
+    event = broadcasts[0]
+    assert event["type"] == "transactions_batch_created"
+    assert [alert["sku"] for alert in event["data"]["low_stock"]] == ["P-1"]
+
+    db = session_factory()
+    queued = db.query(NotificationOutbox).all()
+    db.close()
+    assert [row.payload["subject"] for row in queued] == ["Low Stock Alert - Pallet"]
@@ -0,0 +1,95 @@
+# tests/unit/test_transaction_history.py
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.item import Item
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def seeded(session_factory, auth_headers):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role=UserRole.staff)
+    mouse = Item(name="Mouse", sku="M-1", quantity=100)
+    cable = Item(name="Cable", sku="C-1", quantity=100)
+    db.add_all([user, mouse, cable])
+    db.commit()
+    base = datetime(2024, 1, 1)
+    for i in range(7):
+        db.add(Transaction(
+            user_id=user.id,
+            item_id=mouse.id if i % 2 == 0 else cable.id,
+            quantity=i + 1,
+            type=TransactionType.IN if i < 5 else TransactionType.OUT,
+            # Two rows share a timestamp so the id tie-breaker is exercised.
+            created_at=base + timedelta(minutes=min(i, 5)),
+        ))
+    db.commit()
+    ids = {"user": user.id, "mouse": mouse.id, "cable": cable.id}
+    db.close()
+    return ids, auth_headers(ids["user"])
+
+
+def test_list_transactions_walks_pages_with_cursor(client, seeded):
+    _, headers = seeded
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/transactions/", params=params, headers=headers)
+        assert resp.status_code == 200
+        seen.extend(tx["quantity"] for tx in resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # Newest first, ties on created_at broken by id descending.
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_list_transactions_filters(client, seeded):
+    ids, headers = seeded
+    resp = client.get(
+        "/transactions/",
+        params={"item_id": ids["mouse"], "type": "in", "since": "2024-01-01T00:01:00"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert [tx["quantity"] for tx in resp.json()] == [5, 3]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_list_transactions_rejects_bad_cursor(client, seeded):
+    _, headers = seeded
+    resp = client.get("/transactions/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert resp.status_code == 400
+
+
+def test_export_transactions_csv(client, seeded):
+    ids, headers = seeded
+    resp = client.get(
+        "/transactions/export", params={"item_id": ids["cable"]}, headers=headers
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    lines = resp.text.strip().splitlines()
+    assert lines[0] == "id,created_at,item_id,sku,user_id,username,type,quantity"
+    # Oldest first.
+    assert [line.split(",")[-1] for line in lines[1:]] == ["2", "4", "6"]
+
+
+def test_export_transactions_ndjson(client, seeded):
+    _, headers = seeded
+    resp = client.get(
+        "/transactions/export", params={"format": "ndjson", "type": "out"}, headers=headers
+    )
+    assert resp.status_code == 200
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [(row["sku"], row["type"], row["quantity"]) for row in rows] == [
+        ("C-1", "out", 6),
+        ("M-1", "out", 7),
+    ]
@@ -1,48 +1,104 @@
+import asyncio
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.database import Base
 from app.models.item import Item
+from app.models.transaction import Transaction
 from app.models.user import User
-from app.services.transaction_service import apply_stock_change, InsufficientStockError
+from app.services.transaction_service import (
+    apply_stock_change,
+    InsufficientStockError,
+    ItemNotFoundError,
+)
+
+pytestmark = pytest.mark.anyio
 
 
 @pytest.fixture
-def db():
-    engine = create_engine("sqlite:///:memory:")
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
-    db = TestingSessionLocal()
-    try:
+async def db():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    TestingSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+    await engine.dispose()
 
 
-def test_apply_stock_change_in(db):
-    user = User(username="manager", hashed_password="x", role="manager")
+async def test_apply_stock_change_in(db):
+    user = User(username="manager", email="manager@ims.local", hashed_password="x", role="manager")
     db.add(user)
-    item = Item(name="Mouse", quantity=0, low_stock_threshold=1)
+    item = Item(name="Mouse", sku="MOUSE-1", quantity=0, low_stock_threshold=1)
     db.add(item)
-    db.commit()
-    db.refresh(user)
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(user)
+    await db.refresh(item)
 
-    tx = apply_stock_change(db, item, "in", 5, user.id)
+    tx, updated, quantity, is_low_stock = await apply_stock_change(db, item.id, "in", 5, user.id)
     assert tx.quantity == 5
-    assert item.quantity == 5
-    assert item.is_low_stock is False
+    assert updated.quantity == quantity == 5
+    assert is_low_stock is False
 
 
-def test_apply_stock_change_insufficient(db):
-    user = User(username="staff", hashed_password="x", role="staff")
+async def test_apply_stock_change_insufficient(db):
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role="staff")
     db.add(user)
-    item = Item(name="Keyboard", quantity=1, low_stock_threshold=1)
+    item = Item(name="Keyboard", sku="KB-1", quantity=1, low_stock_threshold=1)
     db.add(item)
-    db.commit()
-    db.refresh(user)
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(user)
+    await db.refresh(item)
 
     with pytest.raises(InsufficientStockError):
-        apply_stock_change(db, item, "out", 3, user.id)
\ No newline at end of file
+        await apply_stock_change(db, item.id, "out", 3, user.id)
+
+    await db.refresh(item)
+    assert item.quantity == 1
+    assert await db.scalar(select(func.count(Transaction.id))) == 0
+
+
+async def test_apply_stock_change_out_to_zero_is_low_stock(db):
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role="staff")
+    item = Item(name="Cable", sku="CABLE-1", quantity=3, low_stock_threshold=1)
+    db.add_all([user, item])
+    await db.commit()
+
+    tx, updated, quantity, is_low_stock = await apply_stock_change(db, item.id, "out", 3, user.id)
+    assert tx.type.value == "out"
+    assert updated.quantity == quantity == 0
+    assert is_low_stock is True
+
+
+async def test_apply_stock_change_unknown_item(db):
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role="staff")
+    db.add(user)
+    await db.commit()
+
+    with pytest.raises(ItemNotFoundError):
+        await apply_stock_change(db, 42, "in", 1, user.id)
+
+
+async def test_concurrent_outbound_movements_cannot_oversell(session_factory, async_session_factory):
+    db = session_factory()
+    user = User(username="staff", email="staff@ims.local", hashed_password="x", role="staff")
+    item = Item(name="Drill", sku="DRILL-1", quantity=10, low_stock_threshold=0)
+    db.add_all([user, item])
+    db.commit()
+    user_id, item_id = user.id, item.id
+    db.close()
+
+    async def take(quantity):
+        # Each movement on its own connection, as separate requests would be
+        async with async_session_factory() as session:
+            return await apply_stock_change(session, item_id, "out", quantity, user_id)
+
+    results = await asyncio.gather(*(take(3) for _ in range(8)), return_exceptions=True)
+
+    assert sum(not isinstance(result, Exception) for result in results) == 3
+    assert all(isinstance(result, InsufficientStockError) for result in results if isinstance(result, Exception))
+    async with async_session_factory() as session:
+        assert await session.scalar(select(Item.quantity).where(Item.id == item_id)) == 1
+        assert await session.scalar(select(func.count(Transaction.id))) == 3
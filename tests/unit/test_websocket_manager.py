@@ -0,0 +1,144 @@
+# tests/unit/test_websocket_manager.py
+import asyncio
+import json
+
+import pytest
+
+from app.services.event_bus import InMemoryEventBus, InMemoryHub
+from app.services.websocket_manager import ConnectionManager
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    def __init__(self, blocked: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.unblocked.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_slow_consumer_does_not_delay_others():
+    manager = ConnectionManager(queue_size=10, slow_consumer_policy="drop_oldest")
+    fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+    await manager.connect(fast)
+    await manager.connect(slow)
+
+    for n in range(3):
+        await manager.broadcast({"n": n})
+    await _settle()
+
+    assert [m["n"] for m in fast.sent] == [0, 1, 2]
+    assert slow.sent == []
+
+    slow.unblocked.set()
+    await _settle()
+    assert [m["n"] for m in slow.sent] == [0, 1, 2]
+
+
+@pytest.mark.parametrize("policy, expected", [
+    ("drop_oldest", [0, 3, 4]),
+    ("drop_newest", [0, 1, 2]),
+])
+async def test_full_queue_drops_per_policy(policy, expected):
+    manager = ConnectionManager(queue_size=2, slow_consumer_policy=policy)
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow)
+
+    await manager.broadcast({"n": 0})
+    await _settle()  # the writer takes message 0 and blocks sending it
+    for n in range(1, 5):
+        await manager.broadcast({"n": n})
+    assert manager.queue_depth() == 2
+
+    slow.unblocked.set()
+    await _settle()
+    assert [m["n"] for m in slow.sent] == expected
+
+
+async def test_full_queue_disconnects_per_policy():
+    manager = ConnectionManager(queue_size=1, slow_consumer_policy="disconnect")
+    slow = FakeWebSocket(blocked=True)
+    await manager.connect(slow)
+
+    for n in range(3):
+        await manager.broadcast({"n": n})
+    await _settle()
+
+    assert slow not in manager.active_connections
+    assert slow.closed_with == 1013
+
+
+async def test_subscriptions_route_by_event_type_item_and_sku_prefix():
+    manager = ConnectionManager(queue_size=10)
+    everything, alerts, aisle, item = (FakeWebSocket() for _ in range(4))
+    for ws in (everything, alerts, aisle, item):
+        await manager.connect(ws)
+    manager.subscribe(alerts, event_types=["low_stock_alert"])
+    manager.subscribe(aisle, sku_prefixes=["A1-"])
+    manager.subscribe(item, item_ids=[7])
+
+    await manager.broadcast({"type": "item_updated", "n": 1}, item_ids=[3], skus=["A1-003"])
+    await manager.broadcast({"type": "low_stock_alert", "n": 2}, item_ids=[9], skus=["B2-009"])
+    await manager.broadcast({"type": "item_updated", "n": 3}, item_ids=[7], skus=["A2-007"])
+    await _settle()
+
+    assert [m["n"] for m in everything.sent] == [1, 2, 3]
+    assert [m["n"] for m in alerts.sent] == [2]
+    assert [m["n"] for m in aisle.sent] == [1]
+    assert [m["n"] for m in item.sent] == [3]
+
+    # Dropping the last subscription goes back to receiving everything.
+    assert manager.unsubscribe(item, item_ids=[7])["item_ids"] == []
+    manager.disconnect(aisle)
+    await manager.broadcast({"type": "item_deleted", "n": 4}, item_ids=[1], skus=["A1-001"])
+    await _settle()
+    assert [m["n"] for m in item.sent] == [3, 4]
+    assert [m["n"] for m in aisle.sent] == [1]
+
+
+async def test_broadcast_reaches_clients_of_every_process_on_the_bus():
+    hub = InMemoryHub()
+    worker_a = ConnectionManager(bus=InMemoryEventBus(hub))
+    worker_b = ConnectionManager(bus=InMemoryEventBus(hub))
+    on_a, on_b, item_watcher = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await worker_a.connect(on_a)
+    await worker_b.connect(on_b)
+    await worker_b.connect(item_watcher)
+    worker_b.subscribe(item_watcher, item_ids=[7])
+
+    await worker_a.broadcast({"type": "item_updated", "data": {"id": 7}}, item_ids=[7], skus=["A1"])
+    await worker_a.broadcast({"type": "item_updated", "data": {"id": 8}}, item_ids=[8], skus=["B1"])
+    await _settle()
+
+    assert [m["data"]["id"] for m in on_a.sent] == [7, 8]
+    assert [m["data"]["id"] for m in on_b.sent] == [7, 8]
+    assert [m["data"]["id"] for m in item_watcher.sent] == [7]
+
+
+async def test_broadcast_survives_a_bus_that_is_down(caplog):
+    class DownBus(InMemoryEventBus):
+        async def publish(self, topic, payload):
+            raise ConnectionError("Event bus is not connected")
+
+    manager = ConnectionManager(bus=DownBus())
+    await manager.broadcast({"type": "item_updated", "data": {"id": 7}}, item_ids=[7])
+    await _settle()
+
+    assert "Publishing a WebSocket event to the event bus failed" in caplog.text
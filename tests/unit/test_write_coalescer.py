@@ -0,0 +1,98 @@
+# tests/unit/test_write_coalescer.py
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models.item import Item
+from app.models.movement_rollup import MovementRollup
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.catalog_version import catalog_version
+from app.services.transaction_service import InsufficientStockError, ItemNotFoundError
+from app.services.write_coalescer import StockWriteCoalescer, write_coalescer
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def seeded(session_factory):
+    db = session_factory()
+    user = User(username="scanner", email="scanner@ims.local", hashed_password="x", role="staff")
+    item = Item(name="Widget", sku="W-1", quantity=10, low_stock_threshold=1)
+    db.add_all([user, item])
+    db.commit()
+    ids = item.id, user.id
+    db.close()
+    return ids
+
+
+async def test_batch_is_one_update_with_per_caller_results(seeded, async_session_factory):
+    item_id, user_id = seeded
+    coalescer = StockWriteCoalescer(session_factory=async_session_factory, window=0.05, max_batch=100)
+    results = await asyncio.gather(
+        *(coalescer.submit(item_id, "out", quantity, user_id) for quantity in (4, 4, 4, 1, 1)),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[2], InsufficientStockError)
+    assert "Available: 2" in str(results[2])
+    accepted = [result for result in results if not isinstance(result, Exception)]
+    assert [tx.quantity for tx, _, _, _ in accepted] == [4, 4, 1, 1]
+    assert len({tx.id for tx, _, _, _ in accepted}) == 4
+    # Quantity and low stock as left by each caller's own movement
+    assert [quantity for _, _, quantity, _ in accepted] == [6, 2, 1, 0]
+    assert [is_low for _, _, _, is_low in accepted] == [False, False, True, True]
+
+    async with async_session_factory() as db:
+        item = await db.get(Item, item_id)
+        assert (item.quantity, item.version) == (0, 2)  # one UPDATE
+        assert await db.scalar(select(func.count(Transaction.id))) == 4
+        assert await db.scalar(select(MovementRollup.quantity_out)) == 10
+        assert await catalog_version(db) == 1
+
+
+async def test_full_batch_flushes_before_window(seeded, async_session_factory):
+    item_id, user_id = seeded
+    coalescer = StockWriteCoalescer(session_factory=async_session_factory, window=60, max_batch=2)
+    results = await asyncio.wait_for(
+        asyncio.gather(coalescer.submit(item_id, "in", 1, user_id), coalescer.submit(item_id, "in", 2, user_id)),
+        timeout=5,
+    )
+    assert [item.quantity for _, item, _, _ in results] == [13, 13]
+    assert [quantity for _, _, quantity, _ in results] == [11, 13]
+
+
+async def test_missing_item_fails_every_caller(seeded, async_session_factory):
+    _, user_id = seeded
+    coalescer = StockWriteCoalescer(session_factory=async_session_factory, window=0.01)
+    results = await asyncio.gather(
+        coalescer.submit(999, "in", 1, user_id), coalescer.submit(999, "out", 1, user_id),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, ItemNotFoundError) for result in results)
+
+
+async def test_stop_applies_pending_movements(seeded, async_session_factory):
+    item_id, user_id = seeded
+    coalescer = StockWriteCoalescer(session_factory=async_session_factory, window=60)
+    pending = asyncio.ensure_future(coalescer.submit(item_id, "out", 3, user_id))
+    await asyncio.sleep(0)
+    await coalescer.stop()
+    _, item, quantity, _ = await pending
+    assert item.quantity == quantity == 7
+
+
+def test_transaction_endpoint_uses_coalescer(client, seeded, auth_headers, async_session_factory, monkeypatch):
+    item_id, user_id = seeded
+    monkeypatch.setattr(settings, "STOCK_COALESCING_ENABLED", True)
+    monkeypatch.setattr(write_coalescer, "session_factory", async_session_factory)
+    headers = auth_headers(user_id)
+
+    resp = client.post("/transactions/", json={"item_id": item_id, "type": "out", "quantity": 4}, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["quantity"] == 4
+    resp = client.post("/transactions/", json={"item_id": item_id, "type": "out", "quantity": 7}, headers=headers)
+    assert resp.status_code == 400
+    assert "Available: 6" in resp.json()["detail"]